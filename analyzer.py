@@ -1,24 +1,41 @@
-import cv2
-import numpy as np
-import pytesseract
-import mss
 import time
 import re
 from game_state import GameState
+from ocr_backend import create_engine
+from digit_templates import DigitTemplateRecognizer
+from ocr_cache import OcrCache
+from pipeline import AnalysisPipeline
+from frame_source import ScreenFrameSource, wall_time
+from metrics import LoopMetrics
+from scheduler import RegionScheduler
+from gametime import GameTimeEstimator
+from preprocess import build_preprocessors
+from countdown_detector import CountdownDetector
+from level_classifier import BannerClassifier
+from frame_ring import FrameRing
+from route import Route, load_route
+from latency import LatencyCalibrator
+from log_queue import LogQueue, DEBUG, INFO, ERROR
 
-# Set tesseract path if needed (Windows default)
-# pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-# If the user has it elsewhere, they might need to uncomment and adjust this.
-try:
-    pytesseract.get_tesseract_version()
-except pytesseract.TesseractNotFoundError:
-    print("Tesseract not found in PATH. Trying default location...", flush=True)
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+class Analyzer:
+    # Order in which regions are captured and OCR'd each frame
+    REGION_NAMES = ("countdown", "gametype", "timer", "level")
 
+    # Actions a route (route.py) can trigger, implemented by the action_* methods
+    ROUTE_ACTIONS = ("gametype_detected", "countdown_done", "start_run", "gametime", "split", "level_split", "finish")
 
-class Analyzer:
-    def __init__(self, livesplit_client, timer_region=None, gametype_region=None, level_region=None, countdown_region=None, log_callback=None, latency_compensation=0.1):
+    ANOMALY_INTERVAL = 5.0  # Seconds between telemetry records of the same anomaly
+
+    # Tesseract settings per region (page segmentation mode + character whitelist)
+    REGION_OCR_CONFIG = {
+        "countdown": {"psm": 7, "whitelist": "0123456789"},
+        "gametype": {"psm": 7, "whitelist": None},
+        "timer": {"psm": 7, "whitelist": "0123456789:"},
+        "level": {"psm": 7, "whitelist": None},
+    }
+
+    def __init__(self, livesplit_client, timer_region=None, gametype_region=None, level_region=None, countdown_region=None, log_queue=None, latency_compensation=0.1, union_capture=True, capture_backend="auto", ocr_backend="auto", timer_template_path="timer_templates.npz", countdown_template_path="countdown_templates.npz", banner_fingerprint_path="banner_fingerprints.npz", pipelined=True, frame_source=None, ocr_rates=None, cpu_budget=0.5, preprocess_config=None, frame_ring_path=None, ocr_executor=None, name=None, telemetry=None, route=None, latency_calibration="off"):
         self.livesplit = livesplit_client
         self.state = GameState()
         # self.sct = mss.mss() # Moved to thread
@@ -30,39 +47,101 @@ class Analyzer:
         self.countdown_region = countdown_region
         
         self.running = False
-        self.log_callback = log_callback  # Function to call for logging
+        self.logs = log_queue or LogQueue()  # Leveled log queue, drained by the console/GUI/file sinks
         self.latency_compensation = latency_compensation # User-configurable buffer
-        
+        # Measures the delay to LiveSplit and sets latency_compensation ("calibrate" once or "auto", see latency.py)
+        self.latency = LatencyCalibrator(self, latency_calibration)
+
+        # Preallocated preprocessing pipeline per region
+        self.set_preprocess_config(preprocess_config)
+
+        # Where frames come from: the screen by default, a recording for offline analysis
+        self.frame_source = frame_source or ScreenFrameSource(union=union_capture, backend=capture_backend)
+
+        # One long-lived OCR engine per region, created in the analysis thread
+        self.ocr_backend = ocr_backend
+        self.ocr_engines = {}
+
+        # Template matcher for the timer digits, Tesseract only on low confidence
+        self.timer_recognizer = DigitTemplateRecognizer(timer_template_path)
+        self.timer_template_hits = 0
+        self.timer_template_misses = 0
+
+        # Contour/template classifier for the countdown digit, Tesseract only on low confidence
+        self.countdown_detector = CountdownDetector(countdown_template_path)
+
+        # States, triggers and levels of the category (route.py), and the
+        # closed-vocabulary classifier for the level banner built from it
+        self.banner_fingerprint_path = banner_fingerprint_path
+        self.set_route(route)
+
+        # Skip OCR on region bitmaps that did not change / were already recognized
+        self.ocr_cache = OcrCache()
+
+        # Append-only store of run starts, splits, level changes, finishes and OCR anomalies
+        self.set_telemetry(telemetry)
+        self.last_anomaly = {}  # anomaly -> time it was last recorded
+
+        # Recent thresholded region frames + texts on disk, for post-mortem debugging
+        self.frame_ring = FrameRing(frame_ring_path) if frame_ring_path else None
+
+        # Per-stage timing histograms, FPS and OCR rate
+        self.metrics = LoopMetrics()
+        if livesplit_client is not None:
+            livesplit_client.metrics = self.metrics
+
+        # Per-region OCR rates by phase, backing off when over the CPU budget
+        self.scheduler = RegionScheduler(ocr_rates, cpu_budget)
+
+        # Capture and OCR regions concurrently (see pipeline.py) instead of one after another
+        self.pipelined = pipelined
+        self.pipeline = None
+        self.ocr_executor = ocr_executor  # Shared OCR pool when several analyzers run in one process
+
+        # Stream name prefixed to log lines (host mode)
+        self.name = name
+
         self.last_split_time = 0
         self.split_cooldown = 5 # Seconds
         
-        # Track previous timer value to detect jumps
-        self.last_timer_value = None
-        
-        # Track countdown sequence (3 -> 2 -> 1)
-        self.last_countdown_value = None
-        self.last_countdown_reset_time = 0
-        self.countdown_reset_cooldown = 10 # Don't reset again within 10 seconds
+        # Elapsed game time estimate of the current run (created at run start)
+        self.gametime = None
         
-        # OCR Optimization Flags - Enable/disable OCR regions based on state
-        self.ocr_countdown_enabled = True   # Start with countdown enabled
-        self.ocr_gametype_enabled = True    # Start with gametype enabled (Parallel detection)
-        self.ocr_timer_enabled = False      # Enable after gametype detected
-        self.ocr_level_enabled = False      # Enable when run starts
         self.gametype_detected = False      # Track if we've detected game type
         
+        # Time-to-first-frame of process_loop (perf_counter at loop start)
+        self.loop_started = None
+
         # Debug
         self.debug_mode = False
         self.debug_counter = 0
     
-    def log(self, message):
-        """Log to both console and GUI"""
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        timestamped_msg = f"[{timestamp}] {message}"
-        print(timestamped_msg, flush=True)
-        if self.log_callback:
-            self.log_callback(timestamped_msg)
+    def log(self, message, *args, level=INFO):
+        """Queue a log line for the console, GUI and log file; formatting is left to them"""
+        if not self.logs.enabled(level):
+            return
+        if self.name:
+            message = f"[{self.name}] {message}"
+        self.logs.log(level, message, *args)
+
+    def set_telemetry(self, telemetry):
+        """TelemetryStore shared by the analyzer and its GameState (None disables it)"""
+        self.telemetry = telemetry
+        self.state.telemetry = telemetry
+
+    def record_split(self, reason, segment, capture_time, now):
+        """Telemetry of a split: the segment it completes and the game time at the split"""
+        if self.telemetry is None:
+            return
+        gametime = self.gametime.elapsed(now) if self.gametime is not None else None
+        self.telemetry.record("split", reason=reason, segment=segment, gametime=gametime, capture_time=self.wall_time(capture_time))
+
+    def record_anomaly(self, anomaly, capture_time, now, **fields):
+        """Telemetry of an OCR anomaly, at most one per kind every ANOMALY_INTERVAL seconds"""
+        if self.telemetry is None or now - self.last_anomaly.get(anomaly, float("-inf")) < self.ANOMALY_INTERVAL:
+            return
+        self.last_anomaly[anomaly] = now
+        self.telemetry.record("anomaly", anomaly=anomaly, capture_time=self.wall_time(capture_time), **fields)
 
     def update_regions(self, timer_region=None, gametype_region=None, level_region=None, countdown_region=None):
         """Update one or more regions"""
@@ -75,40 +154,135 @@ class Analyzer:
         if countdown_region:
             self.countdown_region = countdown_region
 
-    def capture_frame(self, sct, region):
-        if not region:
-            return None
-        
-        # mss requires int
-        monitor = {
-            "top": int(region['top']),
-            "left": int(region['left']),
-            "width": int(region['width']),
-            "height": int(region['height'])
-        }
-        img = np.array(sct.grab(monitor))
-        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-
-    def preprocess_image(self, img, upscale=3):
+    def get_region(self, name):
+        return getattr(self, f"{name}_region")
+
+    def enabled_regions(self):
+        """Names of the configured regions the current route state needs"""
+        return [name for name in self.route.regions() if self.get_region(name)]
+
+    def capture_regions(self, names):
         """
-        Preprocess image for better OCR accuracy.
-        - Upscale the image (OCR works better on larger text)
-        - Convert to grayscale
-        - Apply thresholding to isolate white text
+        Capture several regions at once from the frame source.
+        Returns (capture_time, {name: image}), or None when a recording has ended.
         """
-        # Upscale for better OCR
-        h, w = img.shape[:2]
-        img = cv2.resize(img, (w * upscale, h * upscale), interpolation=cv2.INTER_CUBIC)
-        
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Try adaptive threshold first (better for varying lighting)
-        # thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        
-        # Or simple threshold for white text on dark background
-        _, thresh = cv2.threshold(gray, 140, 255, cv2.THRESH_BINARY)
-        
-        return thresh
+        regions = {name: self.get_region(name) for name in names if self.get_region(name)}
+        start = time.perf_counter()
+        grabbed = self.frame_source.grab(regions)
+        elapsed = time.perf_counter() - start
+        self.metrics.record("capture", elapsed)
+        self.scheduler.add_busy(elapsed)
+        return grabbed
+
+    def next_regions(self):
+        """
+        Block until at least one enabled region is due according to the scheduler,
+        then return the due regions (empty list once stopped).
+        """
+        while self.running:
+            enabled = self.enabled_regions()
+            phase = self.route.current.phase
+            due = self.scheduler.due(enabled, phase)
+            if due:
+                return due
+            time.sleep(min(self.scheduler.time_until_due(enabled), 0.1))
+        return []
+
+    def now(self, capture_time):
+        """Current time for cooldowns: wall clock when live, the frame's media time for recordings"""
+        return time.monotonic() if self.frame_source.realtime else capture_time
+
+    def wall_time(self, capture_time):
+        """Capture time as shown and stored (frame ring, telemetry): epoch seconds when live, media time for recordings"""
+        return wall_time(capture_time) if self.frame_source.realtime else capture_time
+
+    def set_route(self, route):
+        """Route from the config "route" setting: None (EVA Zombies), a definition dict or a JSON file path"""
+        self.route = Route(load_route(route), self.ROUTE_ACTIONS)
+        self.state.level_sequence = list(self.route.levels)
+        self.banner_classifier = BannerClassifier(self.route.vocabulary("level"), self.banner_fingerprint_path)
+
+    def set_latency_calibration(self, mode):
+        """Switch latency calibration mode ("off", "calibrate", "auto"), also while running"""
+        self.latency.set_mode(mode)
+        if self.running:
+            self.latency.start()
+
+    def set_preprocess_config(self, config):
+        """Per-region preprocessing settings (scale, threshold, interpolation, crop, padding)"""
+        self.preprocessors = build_preprocessors(self.REGION_NAMES, config)
+
+    def preprocess_image(self, img, name):
+        """
+        Preprocess a region for OCR with its compiled pipeline (see preprocess.py):
+        grayscale + threshold at native resolution, crop to the text, then scale.
+        Accepts BGR frames as well as BGRA views from the frame source.
+        The result is reused by the next call for the same region.
+        """
+        return self.preprocessors[name](img)
+
+    def open_ocr_engines(self):
+        """Create one pre-configured engine per region (tesserocr / C API / pytesseract)"""
+        self.close_ocr_engines()
+        for name in self.REGION_NAMES:
+            self.ocr_engines[name] = create_engine(backend=self.ocr_backend, **self.REGION_OCR_CONFIG[name])
+        backends = sorted({engine.name for engine in self.ocr_engines.values()})
+        self.log(f"OCR backend: {', '.join(backends)}")
+
+    def close_ocr_engines(self):
+        for engine in self.ocr_engines.values():
+            engine.close()
+        self.ocr_engines = {}
+
+    def ocr(self, name, img):
+        """Run the region's OCR engine on a preprocessed image"""
+        self.metrics.ocr_call()
+        with self.metrics.time(f"ocr.{name}"):
+            return self.ocr_engines[name].recognize(img)
+
+    def recognize_region(self, name, thresh):
+        """Text of a preprocessed region, going through the change-detection cache first"""
+        if name == "timer":
+            return self.ocr_cache.recognize(name, thresh, self.read_timer)
+        if name == "level":
+            return self.ocr_cache.recognize(name, thresh, self.read_level)
+        return self.ocr_cache.recognize(name, thresh, lambda img: self.ocr(name, img))
+
+    def read_timer(self, thresh):
+        """
+        Read the timer with the glyph templates, falling back to Tesseract when the
+        match is not confident. Confirmed Tesseract reads are used to learn templates.
+        """
+        text, confidence = self.timer_recognizer.recognize(thresh)
+        if self.timer_recognizer.is_confident(confidence):
+            self.timer_template_hits += 1
+            return text
+
+        self.timer_template_misses += 1
+        text = self.ocr("timer", thresh)
+        if self.parse_time(text) is not None:
+            self.timer_recognizer.learn(thresh, text)
+        return text
+
+    def read_level(self, thresh):
+        """Canonical banner label (level name, ZOMBIES, VICTOIRE, SCORE) or "" """
+        return self.banner_classifier.classify(thresh, lambda img: self.ocr("level", img))
+
+    def read_countdown(self, img):
+        """
+        Classify the countdown digit without OCR; only ambiguous frames go through
+        preprocessing + Tesseract, and their 1/2/3 reads teach the detector.
+        """
+        with self.metrics.time("countdown_detector"):
+            text, confidence = self.countdown_detector.detect(img)
+        if self.countdown_detector.is_confident(confidence):
+            return text
+
+        with self.metrics.time("preprocess"):
+            thresh = self.preprocess_image(img, "countdown")
+        text = self.recognize_region("countdown", thresh)
+        self.countdown_detector.learn(img, text)
+        return text
 
     def parse_time(self, text):
         # Matches MM:SS, M:SS, MM SS, M SS, MM.SS, etc.
@@ -123,216 +297,218 @@ class Analyzer:
             return minutes * 60 + seconds
         return None
 
+    def recognize_one(self, name, img, capture_time=None):
+        """Preprocess and OCR one captured region"""
+        start = time.perf_counter()
+        if name == "countdown":
+            text = self.read_countdown(img)
+            binary = self.countdown_detector.last_binary
+        else:
+            with self.metrics.time("preprocess"):
+                thresh = self.preprocess_image(img, name)
+            text = self.recognize_region(name, thresh)
+            binary = self.preprocessors[name].binary  # Native resolution, before scaling
+
+        if self.frame_ring is not None and capture_time is not None:
+            with self.metrics.time("frame_ring"):
+                self.frame_ring.write(self.wall_time(capture_time), name, binary, text)
+        self.scheduler.add_busy(time.perf_counter() - start)
+        return text
+
+    def recognize_frame(self, frames, capture_time=None):
+        """Preprocess and OCR every captured region. Returns {name: text}"""
+        return {name: self.recognize_one(name, img, capture_time) for name, img in frames.items()}
+
+    def complete_frame(self, texts, capture_time):
+        """Run the state logic on a recognized frame and record its timings"""
+        start = time.perf_counter()
+        self.handle_frame(texts, capture_time)
+        elapsed = time.perf_counter() - start
+        self.metrics.record("logic", elapsed)
+        self.scheduler.add_busy(elapsed)
+        self.metrics.record("frame", self.now(capture_time) - capture_time)
+        if self.loop_started is not None:
+            self.log(f"First frame processed {time.perf_counter() - self.loop_started:.2f}s after loop start")
+            self.loop_started = None
+        self.metrics.frame_done()
+
+    def handle_frame(self, texts, capture_time):
+        """
+        Apply countdown/start/split/finish logic to the OCR results of one frame.
+        capture_time is when the frame was grabbed, used for latency compensation.
+        """
+        now = self.now(capture_time)
+
+        # STATE-BASED OCR - Only the regions the current route state needs were read
+        timer_text = texts.get("timer", "")
+        current_time_seconds = self.parse_time(timer_text) if "timer" in texts else None
+
+        # Debug - only log every 10 frames to reduce spam, nothing is built below DEBUG level
+        self.debug_counter += 1
+        if self.logs.enabled(DEBUG) and self.debug_counter % 10 == 0:
+            log_parts = [f"State: {self.route.current.name}"]
+            for name in self.REGION_NAMES:
+                if name in texts:
+                    reading = f" ({current_time_seconds})" if name == "timer" else ""
+                    log_parts.append(f"{name.capitalize()}: '{texts[name]}'{reading}")
+            stats = self.ocr_cache.stats()
+            log_parts.append(f"OCR skipped: {stats['skip_ratio']:.0%}")
+            self.log(", ".join(log_parts), level=DEBUG)
+
+        # Per-frame actions of the current state, then its triggers in order
+        state = self.route.current
+        for action in state.each_frame:
+            getattr(self, f"action_{action}")(None, texts, capture_time, now)
+
+        for trigger, match in self.route.step(texts, now, self.parse_time, capture_time):
+            if trigger.action:
+                # A trigger that needs several frames happened at the first of them
+                getattr(self, f"action_{trigger.action}")(match, texts, trigger.streak_start, now)
+
+        if self.route.current is not state:
+            self.log(f"OCR: {state.name} -> {self.route.current.name}, reading {', '.join(self.route.regions()) or 'nothing'}")
+
+    # Route actions (see route.py): called with the trigger's match, the frame's
+    # texts, its capture time and the current time
+
+    def action_gametype_detected(self, match, texts, capture_time, now):
+        if not self.gametype_detected:
+            self.gametype_detected = True
+            self.log(f"Game type detected: {match}")
+
+    def action_countdown_done(self, match, texts, capture_time, now):
+        self.log("Countdown detected (3->2) - waiting for the timer to start the run")
+
+    def action_start_run(self, match, texts, capture_time, now):
+        current_time_seconds = self.parse_time(texts["timer"])
+        self.log(f"Detected Start Condition (Timer jump to {current_time_seconds}s). Starting Run.")
+        self.state.start_run(current_time_seconds)
+        self.livesplit.start()
+        self.livesplit.set_gametime(0) # Start at 0
+
+        # Game time is 0 at the frame where the timer jumped
+        self.gametime = GameTimeEstimator(current_time_seconds)
+        self.gametime.anchor(0.0, capture_time, 0.5)
+        self.gametime.observe(current_time_seconds, capture_time)
+
+    def action_gametime(self, match, texts, capture_time, now):
+        """
+        IGT Update: Sync LiveSplit Game Time with the clock-driven estimate.
+        OCR readings only anchor/correct the estimator (see gametime.py); between
+        readings it extrapolates, so every frame can send a sub-second game time
+        """
+        if self.gametime is None:
+            return
+        timer_text = texts.get("timer", "")
+        current_time_seconds = self.parse_time(timer_text) if "timer" in texts else None
+        if current_time_seconds is not None:
+            reanchors = self.gametime.reanchors
+            self.gametime.observe(current_time_seconds, capture_time)
+            if self.gametime.reanchors > reanchors:
+                self.record_anomaly("gametime_reanchor", capture_time, now, reading=current_time_seconds)
+        elif timer_text:
+            self.record_anomaly("timer_unreadable", capture_time, now, text=timer_text)
+
+        # The estimate is taken at 'now', which already covers the time spent
+        # processing the frame. We also add a small buffer (user configured)
+        # to account for transmission/display lag
+        elapsed_gametime = self.gametime.elapsed(now)
+        if elapsed_gametime is not None:
+            adjusted_gametime = elapsed_gametime + self.latency_compensation
+
+            # Send to LiveSplit (only if valid positive time)
+            if adjusted_gametime >= 0:
+                self.livesplit.set_gametime(adjusted_gametime)
+
+    def action_split(self, match, texts, capture_time, now):
+        """Transition banner (e.g. ZOMBIES) between two levels"""
+        if now - self.last_split_time > self.split_cooldown:
+            self.log(f"Triggering Split: {match} transition")
+            self.record_split("transition", self.state.current_level, capture_time, now)
+            self.livesplit.split()
+            self.last_split_time = now
+
+    def action_level_split(self, match, texts, capture_time, now):
+        """A later level's banner: change level, and split unless the transition banner just did"""
+        previous_level = self.state.current_level
+        if not self.state.set_level(match):
+            return
+        # Trigger split if we haven't split recently (e.g. on "ZOMBIES")
+        if now - self.last_split_time > self.split_cooldown:
+            self.log(f"Triggering Split: Level changed to '{match}'")
+            self.record_split("level", previous_level, capture_time, now)
+            self.livesplit.split()
+            self.last_split_time = now
+        else:
+            self.log(f"Level changed to '{match}' (Split already handled by the transition)")
+
+    def action_finish(self, match, texts, capture_time, now):
+        self.log(f"Run Complete: Detected '{match}'")
+        self.record_split("finish", self.state.current_level, capture_time, now)
+        self.state.finish_run()
+        if self.gametime is not None:
+            # Game time kept running while the finish was being confirmed over several
+            # frames: set it back to the frame that showed the finish
+            finish_gametime = self.gametime.elapsed(capture_time)
+            if finish_gametime is not None and finish_gametime >= 0:
+                self.livesplit.set_gametime(finish_gametime)
+        self.livesplit.split()
+        self.gametype_detected = False
+
     def process_loop(self):
         self.log("=== PROCESS LOOP STARTED ===")
         self.running = True
+        self.loop_started = time.perf_counter()
         
         # Check that required regions are set (countdown is optional)
         if not self.timer_region or not self.gametype_region or not self.level_region:
-            self.log("ERROR: Not all required regions are set. Please select Timer, Game Type, and Level regions.")
+            self.log("ERROR: Not all required regions are set. Please select Timer, Game Type, and Level regions.", level=ERROR)
             return
         
         if self.countdown_region:
             self.log("Countdown region enabled - timer will reset when countdown (3, 2, 1) is detected")
         
         try:
-            with mss.mss() as sct:
+            self.open_ocr_engines()
+            self.latency.start()
+            if self.pipelined:
+                self.pipeline = AnalysisPipeline(self, executor=self.ocr_executor)
+                self.pipeline.run()
+                return
+
+            with self.frame_source:
                 while self.running:
                     try:
-                        loop_start_time = time.time()
-                        
-                        # STATE-BASED OCR - Only run necessary OCR operations
-                        countdown_text = ""
-                        gametype_text = ""
-                        timer_text = ""
-                        level_text = ""
-                        
-                        # 1. Countdown OCR (when enabled)
-                        if self.ocr_countdown_enabled and self.countdown_region:
-                            countdown_frame = self.capture_frame(sct, self.countdown_region)
-                            if countdown_frame is not None:
-                                countdown_thresh = self.preprocess_image(countdown_frame)
-                                countdown_text = pytesseract.image_to_string(countdown_thresh, config='--psm 7 -c tessedit_char_whitelist=0123456789').strip()
-                        
-                        # 2. Game Type OCR (when enabled)
-                        if self.ocr_gametype_enabled:
-                            gametype_frame = self.capture_frame(sct, self.gametype_region)
-                            if gametype_frame is not None:
-                                gametype_thresh = self.preprocess_image(gametype_frame)
-                                gametype_text = pytesseract.image_to_string(gametype_thresh, config='--psm 7').strip()
-                        
-                        # 3. Timer OCR (when enabled)
-                        if self.ocr_timer_enabled:
-                            timer_frame = self.capture_frame(sct, self.timer_region)
-                            if timer_frame is not None:
-                                timer_thresh = self.preprocess_image(timer_frame)
-                                timer_text = pytesseract.image_to_string(timer_thresh, config='--psm 7 -c tessedit_char_whitelist=0123456789:').strip()
-                        
-                        # 4. Level OCR (when enabled)
-                        if self.ocr_level_enabled:
-                            level_frame = self.capture_frame(sct, self.level_region)
-                            if level_frame is not None:
-                                level_thresh = self.preprocess_image(level_frame)
-                                level_text = pytesseract.image_to_string(level_thresh, config='--psm 7').strip()
-                        
-                        # COUNTDOWN DETECTION - Simple: Reset when "2" appears after "3"
-                        if countdown_text == '3':
-                            # Remember we saw 3
-                            self.last_countdown_value = '3'
-                        elif countdown_text == '2' and self.last_countdown_value == '3':
-                            # 3 -> 2 transition detected! Reset timer
-                            if time.time() - self.last_countdown_reset_time > self.countdown_reset_cooldown:
-                                self.log(f"Countdown detected (3->2) - Resetting LiveSplit timer")
-                                # OPTIMIZATION: After countdown, disable countdown OCR
-                                # Since GameType is checked in parallel, we can switch DIRECTLY to Timer OCR
-                                self.ocr_countdown_enabled = False
-                                self.ocr_gametype_enabled = False # Disable gametype too (assume checked or don't care)
-                                self.ocr_timer_enabled = True
-                                self.gametype_detected = False
-                                self.log("OCR: Countdown disabled, Timer enabled (GameType skipped/done)")
-                                
-                            self.last_countdown_value = None  # Reset for next countdown
-                        elif countdown_text not in ['1', '2', '3']:
-                            # Not a countdown number, reset tracking
-                            self.last_countdown_value = None
-                        
-                        # GAME TYPE DETECTION - Detect once then disable (Parallel with Countdown)
-                        if self.ocr_gametype_enabled and not self.gametype_detected and gametype_text:
-                            if "ZOMBIES" in gametype_text.upper() or "SURVIVAL" in gametype_text.upper():
-                                self.gametype_detected = True
-                                self.log(f"Game type detected: {gametype_text}")
-                                # Don't change other flags, just mark as detected
-                                # We wait for countdown to finish to switch to Timer
-
-                        # Logic
-                        current_time_seconds = self.parse_time(timer_text)
-                        
-                        # Debug - only log every 10 frames to reduce spam
-                        # Debug - only log every 10 frames to reduce spam
-                        if self.debug_counter % 10 == 0:
-                            log_parts = []
-                            if self.ocr_timer_enabled or timer_text:
-                                log_parts.append(f"Timer: '{timer_text}' ({current_time_seconds})")
-                            if self.ocr_gametype_enabled or gametype_text:
-                                log_parts.append(f"GameType: '{gametype_text}'")
-                            if self.ocr_level_enabled or level_text:
-                                log_parts.append(f"Level: '{level_text}'")
-                            if self.ocr_countdown_enabled and countdown_text:
-                                log_parts.append(f"Countdown: '{countdown_text}'")
-                            
-                            if log_parts:
-                                self.log(", ".join(log_parts))
-
-                        if self.state.state == GameState.IDLE or self.state.state == GameState.FINISHED:
-                            # Start Detection: Detect JUMP from low time to high time (approximately +10 minutes)
-                            if current_time_seconds and self.last_timer_value:
-                                timer_jump = current_time_seconds - self.last_timer_value
-                                # If timer jumps UP by at least 10 minutes (600 seconds), it's a start
-                                if timer_jump >= 600:
-                                    self.log(f"Detected Start Condition (Timer jump: {self.last_timer_value}s → {current_time_seconds}s, +{timer_jump}s). Starting Run.")
-                                    self.state.start_run(current_time_seconds)
-                                    self.livesplit.start()
-                                    self.livesplit.set_gametime(0) # Start at 0
-                                    
-                                    # OPTIMIZATION: Run started, enable Level OCR
-                                    self.ocr_level_enabled = True
-                                    self.log("OCR: Run started, Level enabled")
-                            
-                            # Update last timer value for next iteration
-                            if current_time_seconds:
-                                self.last_timer_value = current_time_seconds
-
-                        elif self.state.state == GameState.RUNNING or self.state.state == GameState.FINISHED:
-                            # Reset Detection: DISABLED as per user request
-                            # if current_time_seconds and current_time_seconds < 600:
-                            #    self.log(f"Detected Lobby/Low Time ({current_time_seconds}s). Resetting state to IDLE.")
-                            #    self.state.reset()
-                            #    self.livesplit.reset()
-                            
-                            # IGT Update: Sync LiveSplit Game Time with OCR Time
-                            if current_time_seconds is not None and self.state.start_time is not None:
-                                # Calculate elapsed Game Time
-                                # Start Time (e.g. 1800s) - Current Time (e.g. 1789s) = 11s elapsed
-                                elapsed_gametime = self.state.start_time - current_time_seconds
-                                
-                                # COMPENSATION: Add processing latency + buffer
-                                # The frame captured at 'loop_start_time' took 'time.time() - loop_start_time' to process.
-                                # By the time we send this, the game has advanced by that much.
-                                # We also add a small buffer (user configured) to account for transmission/display lag
-                                latency = time.time() - loop_start_time
-                                adjusted_gametime = elapsed_gametime + latency + self.latency_compensation
-                                
-                                # Send to LiveSplit (only if valid positive time)
-                                if adjusted_gametime >= 0:
-                                    self.livesplit.set_gametime(adjusted_gametime)
-                            
-                            # Split Logic
-                            # 1. "ZOMBIES" transition
-                            if "ZOMBIES" in level_text.upper():
-                                if time.time() - self.last_split_time > self.split_cooldown:
-                                    self.log("Triggering Split: ZOMBIES transition")
-                                    self.livesplit.split()
-                                    self.last_split_time = time.time()
-                            
-                            # 2. Level Name Change
-                            # Filter noise - only process clean level names
-                            clean_level = level_text.strip()
-                            # Allow spaces in level names (e.g. "Top Floor")
-                            is_valid_name = clean_level.replace(" ", "").isalpha()
-                            if len(clean_level) > 2 and "ZOMBIES" not in clean_level.upper() and is_valid_name:
-                                 # Check if level changed (Valid Sequence)
-                                 if self.state.set_level(level_text):
-                                     # Level changed (e.g. Isolation -> Lab)
-                                     # Trigger split if we haven't split recently (e.g. on "ZOMBIES")
-                                     if time.time() - self.last_split_time > self.split_cooldown:
-                                         self.log(f"Triggering Split: Level changed to '{level_text}'")
-                                         self.livesplit.split()
-                                         self.last_split_time = time.time()
-                                     else:
-                                         self.log(f"Level changed to '{level_text}' (Split already handled by ZOMBIES)")
-
-                            # End Logic
-                            # 1. Game Type Change Detection (after Hangar level)
-                            # If we're at Hangar and GameType changes from ZOMBIES, the run is complete
-                            if self.state.current_level == "Hangar":
-                                if "ZOMBIES" not in gametype_text.upper() and len(gametype_text.strip()) > 0:
-                                    self.log(f"Run Complete: GameType changed from ZOMBIES to '{gametype_text}' at Hangar")
-                                    self.state.finish_run()
-                                    self.livesplit.split()
-                                    
-                                    # OPTIMIZATION: Run finished, reset OCR state
-                                    self.ocr_countdown_enabled = True
-                                    self.ocr_gametype_enabled = False
-                                    self.ocr_timer_enabled = False
-                                    self.ocr_level_enabled = False
-                                    self.gametype_detected = False
-                                    self.log("OCR: Run finished, resetting state (Countdown enabled)")
-                            
-                            # 2. Traditional end detection (VICTOIRE/SCORE text)
-                            if "VICTOIRE" in level_text.upper() or "SCORE" in level_text.upper():
-                                self.log("Run Complete: Detected VICTOIRE/SCORE")
-                                self.state.finish_run()
-                                self.livesplit.split()
-                                
-                                # OPTIMIZATION: Run finished, reset OCR state
-                                self.ocr_countdown_enabled = True
-                                self.ocr_gametype_enabled = True # Enable parallel detection
-                                self.ocr_timer_enabled = False
-                                self.ocr_level_enabled = False
-                                self.gametype_detected = False
-                                self.log("OCR: Run finished, resetting state (Countdown + GameType enabled)")
-
-                        # No sleep - process frames as fast as possible for instant response
+                        # Single grab of every enabled region that is due
+                        names = self.next_regions()
+                        if not names:
+                            break
+                        grabbed = self.capture_regions(names)
+                        if grabbed is None:
+                            self.log("Frame source exhausted")
+                            break
+                        capture_time, frames = grabbed
+                        texts = self.recognize_frame(frames, capture_time)
+                        self.complete_frame(texts, capture_time)
+
+                        # No fixed sleep - next_regions() waits for the scheduler instead
                     except Exception as e:
-                        self.log(f"ERROR in frame processing: {e}")
+                        self.log(f"ERROR in frame processing: {e}", level=ERROR)
                         import traceback
                         traceback.print_exc()
                         time.sleep(0.1)
         except Exception as e:
-            self.log(f"FATAL ERROR in process_loop: {e}")
+            self.log(f"FATAL ERROR in process_loop: {e}", level=ERROR)
             import traceback
             traceback.print_exc()
         finally:
+            self.latency.stop()
+            self.close_ocr_engines()
+            self.timer_recognizer.save()
+            self.countdown_detector.save()
+            self.banner_classifier.save()
+            if self.frame_ring is not None:
+                self.frame_ring.flush()
             self.log("=== PROCESS LOOP ENDED ===")
 
     def stop(self):
@@ -0,0 +1,227 @@
+"""
+Benchmark suite for the analyzer hot path.
+
+Renders synthetic timer/gametype/level/countdown images at several scales and
+noise levels, times every stage separately and reports throughput, p50/p99
+latency and recognition accuracy:
+
+    python benchmark.py                     # compare against benchmark_baseline.json
+    python benchmark.py --save-baseline     # record a new baseline
+
+Exits with status 1 when a stage got slower (p50 beyond --tolerance) or less
+accurate than the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from analyzer import Analyzer
+from frame_source import ScreenFrameSource
+from game_state import GameState
+from synthetic import render_region, sample_text
+
+SCALES = (0.75, 1.0, 1.5)
+NOISE_LEVELS = (0.0, 8.0, 20.0)
+ACCURACY_TOLERANCE = 0.02  # Allowed absolute drop in accuracy
+
+
+def summarize(durations, correct=None):
+    """Stats for a list of per-call durations in seconds"""
+    d = np.array(durations)
+    stats = {
+        "calls": len(d),
+        "throughput": len(d) / d.sum() if d.sum() > 0 else 0.0,
+        "p50_ms": float(np.percentile(d, 50) * 1000),
+        "p99_ms": float(np.percentile(d, 99) * 1000),
+    }
+    if correct is not None:
+        stats["accuracy"] = sum(correct) / len(correct) if correct else 0.0
+    return stats
+
+
+def timed(fn, items):
+    """Call fn on every item, returning (results, durations)"""
+    results, durations = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(item))
+        durations.append(time.perf_counter() - start)
+    return results, durations
+
+
+def is_correct(analyzer, region, expected, text):
+    if region == "timer":
+        return analyzer.parse_time(text) == analyzer.parse_time(expected)
+    if region == "countdown":
+        return text.strip() == expected
+    return expected.upper() in text.upper()
+
+
+def make_samples(region, count, rng, np_rng):
+    samples = []
+    for i in range(count):
+        text = sample_text(region, rng)
+        scale = SCALES[i % len(SCALES)]
+        noise = NOISE_LEVELS[(i // len(SCALES)) % len(NOISE_LEVELS)]
+        samples.append((text, render_region(region, text, scale, noise, np_rng)))
+    return samples
+
+
+def bench_capture(iterations, backend):
+    """
+    Screen grab of the configured regions (skipped without a display, e.g. run under Xvfb).
+    alloc_kb is the Python memory allocated per grab (new screenshot buffers).
+    """
+    regions = {name: {"top": 0, "left": i * 130, "width": 120, "height": 40} for i, name in enumerate(Analyzer.REGION_NAMES)}
+    source = ScreenFrameSource(backend=backend)
+    try:
+        source.open()
+    except Exception as e:
+        print(f"  capture.{backend}: skipped ({e})", flush=True)
+        return None
+    try:
+        _, durations = timed(lambda _: source.grab(regions), range(iterations))
+        allocated = 0
+        tracemalloc.start()
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            source.grab(regions)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+    finally:
+        source.close()
+    stats = summarize(durations)
+    stats["alloc_kb"] = allocated / iterations / 1024
+    return stats
+
+
+def run_benchmarks(iterations, ocr_backend):
+    rng = random.Random(1234)
+    np_rng = np.random.default_rng(1234)
+    results = {}
+
+    # Templates go to a scratch file so the user's learned templates are untouched
+    template_path = os.path.join(tempfile.mkdtemp(), "timer_templates.npz")
+    analyzer = Analyzer(None, ocr_backend=ocr_backend, timer_template_path=template_path, pipelined=False)
+
+    print("Capture...", flush=True)
+    for backend in ("mss", "xshm"):
+        capture = bench_capture(iterations, backend)
+        if capture:
+            results[f"capture.{backend}"] = capture
+            print(f"  capture.{backend}: {capture['alloc_kb']:.1f} KB allocated per grab", flush=True)
+
+    samples = {region: make_samples(region, iterations, rng, np_rng) for region in Analyzer.REGION_NAMES}
+
+    print("Preprocess...", flush=True)
+    thresholds = {}
+    for region, items in samples.items():
+        # Preprocessors reuse their output buffer, keep a copy of each result
+        thresholds[region], durations = timed(lambda img: analyzer.preprocess_image(img, region).copy(), [img for _, img in items])
+        results[f"preprocess.{region}"] = summarize(durations)
+
+    print("OCR...", flush=True)
+    try:
+        analyzer.open_ocr_engines()
+    except RuntimeError as e:
+        print(f"  OCR: skipped ({e})", flush=True)
+    else:
+        for region, items in samples.items():
+            texts, durations = timed(lambda img: analyzer.ocr(region, img), thresholds[region])
+            correct = [is_correct(analyzer, region, expected, text) for (expected, _), text in zip(items, texts)]
+            results[f"ocr.{region}"] = summarize(durations, correct)
+
+        # Timer templates: learn on the first half, measure on the second
+        half = len(thresholds["timer"]) // 2
+        for thresh in thresholds["timer"][:half]:
+            analyzer.read_timer(thresh)
+        texts, durations = timed(analyzer.read_timer, thresholds["timer"][half:])
+        correct = [is_correct(analyzer, "timer", expected, text) for (expected, _), text in zip(samples["timer"][half:], texts)]
+        results["ocr.timer_templates"] = summarize(durations, correct)
+        analyzer.close_ocr_engines()
+
+    print("Logic...", flush=True)
+    timer_strings = [text for text, _ in samples["timer"]]
+    _, durations = timed(analyzer.parse_time, timer_strings)
+    results["parse_time"] = summarize(durations)
+
+    level_names = [text for text, _ in samples["level"]]
+    state = GameState()
+
+    def set_level(name):
+        state.current_level_index = -1  # Every name is a valid "next" level
+        return state.set_level(name)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, durations = timed(set_level, level_names)
+    results["game_state.set_level"] = summarize(durations)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages"""
+    regressions = []
+    for stage, base in baseline.items():
+        current = results.get(stage)
+        if current is None:
+            continue
+        if current["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p50 {base['p50_ms']:.3f}ms -> {current['p50_ms']:.3f}ms")
+        if "accuracy" in base and current.get("accuracy", 0.0) < base["accuracy"] - ACCURACY_TOLERANCE:
+            regressions.append(f"{stage}: accuracy {base['accuracy']:.1%} -> {current['accuracy']:.1%}")
+    return regressions
+
+
+def print_report(results):
+    print(f"\n{'stage':<28}{'calls':>7}{'ops/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'accuracy':>10}")
+    for stage, stats in results.items():
+        accuracy = f"{stats['accuracy']:.1%}" if "accuracy" in stats else "-"
+        print(f"{stage:<28}{stats['calls']:>7}{stats['throughput']:>11.1f}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{accuracy:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer hot path on synthetic HUD frames")
+    parser.add_argument("--iterations", type=int, default=90, help="Samples per region and stage")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p50 slowdown")
+    parser.add_argument("--ocr-backend", default="auto")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.iterations, args.ocr_backend)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
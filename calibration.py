@@ -0,0 +1,248 @@
+"""
+Automatic HUD region calibration.
+
+Once regions have been selected by hand, `learn` stores a binary template of
+each region plus the layout of all four regions (hud_templates.npz). After a
+resolution or window change, `calibrate` grabs the screen once and finds the
+templates again with a coarse-to-fine multi-scale search:
+- coarse: every scale is tried on a 4x downscaled image pyramid level
+- fine: the best candidate is refined at full resolution in a small window
+  around it, at scales close to the coarse one
+Regions whose content is not on screen (level banner, countdown) or matches
+poorly are placed from the learned layout, using the scale and offset of the
+regions that were found. `check` only searches around the current regions at
+their current scale, which is cheap enough to run during a session to detect drift.
+
+    python calibration.py learn       # with the HUD visible and regions set
+    python calibration.py calibrate   # writes the found regions to config.json
+    python calibration.py check       # reports drift, --fix updates config.json
+"""
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+
+from config import CONFIG_FILE, REGION_NAMES, load_config, update_config
+
+TEMPLATE_FILE = "hud_templates.npz"
+
+THRESHOLD = 140          # Same white-text threshold as the OCR preprocessing
+PYRAMID_LEVELS = 2       # Coarse search on the screen downscaled by 2**PYRAMID_LEVELS
+SCALES = np.geomspace(0.5, 2.0, 15)      # Template scales tried in the coarse search
+REFINE_SCALES = np.geomspace(0.94, 1.06, 5)  # Relative scales tried around the coarse match
+MIN_SCORE = 0.6          # Normalized correlation for a region to count as found
+MIN_TEXT_RATIO = 0.01    # Templates with fewer text pixels than this are not searched
+
+
+def grab_screen():
+    """Full screenshot of the primary monitor (BGRA) and its offset on the virtual screen"""
+    import mss
+    with mss.mss() as sct:
+        monitor = sct.monitors[1]
+        shot = sct.grab(monitor)
+        return np.array(shot), monitor["left"], monitor["top"]
+
+
+def binarize(img):
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(img, THRESHOLD, 255, cv2.THRESH_BINARY)
+    return binary
+
+
+def rect(region):
+    return int(region['left']), int(region['top']), int(region['width']), int(region['height'])
+
+
+def learn_templates(screen, offset, regions, path=TEMPLATE_FILE):
+    """Store the binary content and position of every configured region"""
+    binary = binarize(screen)
+    data = {}
+    for name in REGION_NAMES:
+        region = regions.get(f"{name}_region")
+        if not region:
+            continue
+        left, top, width, height = rect(region)
+        x, y = left - offset[0], top - offset[1]
+        data[f"{name}_template"] = binary[y:y + height, x:x + width]
+        data[f"{name}_rect"] = np.array([left, top, width, height])
+    np.savez(path, **data)
+    return sorted(key[:-len("_rect")] for key in data if key.endswith("_rect"))
+
+
+def load_templates(path=TEMPLATE_FILE):
+    """name -> (template, (left, top, width, height)) as learned"""
+    data = np.load(path)
+    return {
+        name: (data[f"{name}_template"], tuple(int(v) for v in data[f"{name}_rect"]))
+        for name in REGION_NAMES if f"{name}_rect" in data
+    }
+
+
+def searchable(template):
+    return template.size and np.count_nonzero(template) > MIN_TEXT_RATIO * template.size
+
+
+def _match(image, template):
+    """Best (score, (x, y)) of a template in an image"""
+    th, tw = template.shape
+    if th > image.shape[0] or tw > image.shape[1] or th < 3 or tw < 3:
+        return -1.0, None
+    result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, loc = cv2.minMaxLoc(result)
+    return float(score), loc
+
+
+def _resized(template, scale):
+    h, w = template.shape
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(template, size, interpolation=cv2.INTER_AREA)
+
+
+def refine(binary, template, x, y, scale, margin):
+    """Full-resolution search in a window around (x, y) at scales close to scale. Returns (score, x, y, scale)."""
+    best = (-1.0, x, y, scale)
+    for s in scale * REFINE_SCALES:
+        t = _resized(template, s)
+        th, tw = t.shape
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(binary.shape[1], x + tw + margin), min(binary.shape[0], y + th + margin)
+        score, loc = _match(binary[y0:y1, x0:x1], t)
+        if loc is not None and score > best[0]:
+            best = (score, x0 + loc[0], y0 + loc[1], s)
+    return best
+
+
+def search(pyramid, template):
+    """Coarse-to-fine multi-scale search. Returns (score, x, y, scale) in full-resolution pixels."""
+    factor = 2 ** PYRAMID_LEVELS
+    coarse = pyramid[-1]
+    best = (-1.0, 0, 0, 1.0)
+    for scale in SCALES:
+        score, loc = _match(coarse, _resized(template, scale / factor))
+        if loc is not None and score > best[0]:
+            best = (score, loc[0] * factor, loc[1] * factor, scale)
+    if best[0] < 0:
+        return best
+    return refine(pyramid[0], template, best[1], best[2], best[3], margin=2 * factor)
+
+
+def build_pyramid(binary):
+    pyramid = [binary]
+    for _ in range(PYRAMID_LEVELS):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def calibrate(screen, offset, templates):
+    """
+    Locate every learned region on a screenshot.
+    Returns ({name_region: region}, {name: report}); report has score, scale and
+    method ("match" or "layout"). Raises RuntimeError when no region is found.
+    """
+    pyramid = build_pyramid(binarize(screen))
+    found, report = {}, {}
+    for name, (template, _) in templates.items():
+        if not searchable(template):
+            continue
+        score, x, y, scale = search(pyramid, template)
+        report[name] = {"score": round(score, 3), "scale": round(scale, 3), "method": "match"}
+        if score >= MIN_SCORE:
+            found[name] = (x + offset[0], y + offset[1], scale)
+    if not found:
+        raise RuntimeError("No HUD element found on screen, is the game visible?")
+
+    # Layout of the learned regions: screen = scale * learned + shift
+    scale = float(np.median([s for _, _, s in found.values()]))
+    shift_x = float(np.median([x - scale * templates[n][1][0] for n, (x, _, _) in found.items()]))
+    shift_y = float(np.median([y - scale * templates[n][1][1] for n, (_, y, _) in found.items()]))
+
+    regions = {}
+    for name, (_, (left, top, width, height)) in templates.items():
+        if name in found:
+            x, y, s = found[name]
+        else:
+            x, y, s = scale * left + shift_x, scale * top + shift_y, scale
+            report.setdefault(name, {"score": None, "scale": round(scale, 3)})["method"] = "layout"
+        regions[f"{name}_region"] = {
+            "top": int(round(y)), "left": int(round(x)),
+            "width": int(round(width * s)), "height": int(round(height * s)),
+        }
+    return regions, report
+
+
+def check_drift(screen, offset, templates, regions, margin=24):
+    """
+    Cheap re-check of configured regions: each template is searched only near its
+    current region, at the region's current scale. Returns {name: report} with
+    the drift in pixels (None when the element is not visible).
+    """
+    binary = binarize(screen)
+    report = {}
+    for name, (template, (_, _, width, _)) in templates.items():
+        region = regions.get(f"{name}_region")
+        if not region or not searchable(template):
+            continue
+        left, top, current_width, _ = rect(region)
+        scale = current_width / float(width)
+        score, x, y, s = refine(binary, template, left - offset[0], top - offset[1], scale, margin)
+        visible = score >= MIN_SCORE
+        report[name] = {
+            "score": round(score, 3),
+            "drift": (x + offset[0] - left, y + offset[1] - top) if visible else None,
+            "scale": round(s, 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Locate the HUD regions on screen automatically")
+    parser.add_argument("command", choices=["learn", "calibrate", "check"])
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--templates", default=TEMPLATE_FILE)
+    parser.add_argument("--fix", action="store_true", help="check: move drifted regions in the config")
+    parser.add_argument("--tolerance", type=int, default=3, help="check: pixels of drift that are ignored")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    screen, left, top = grab_screen()
+    offset = (left, top)
+
+    if args.command == "learn":
+        names = learn_templates(screen, offset, config, args.templates)
+        print(f"Learned HUD templates for {', '.join(names)} -> {args.templates}", flush=True)
+        return
+
+    if not os.path.exists(args.templates):
+        print(f"{args.templates} not found: select the regions once and run 'learn' first", flush=True)
+        return
+    templates = load_templates(args.templates)
+
+    if args.command == "calibrate":
+        start = time.perf_counter()
+        regions, report = calibrate(screen, offset, templates)
+        elapsed = time.perf_counter() - start
+        for name, entry in report.items():
+            print(f"  {name:<10} {entry['method']:<7} score {entry['score']}  scale {entry['scale']}  {regions[f'{name}_region']}", flush=True)
+        update_config(regions, args.config)
+        print(f"Calibrated in {elapsed * 1000:.0f} ms, regions written to {args.config}", flush=True)
+        return
+
+    report = check_drift(screen, offset, templates, config)
+    fixes = {}
+    for name, entry in report.items():
+        drift = entry["drift"]
+        print(f"  {name:<10} score {entry['score']}  drift {drift}", flush=True)
+        if drift and max(abs(drift[0]), abs(drift[1])) > args.tolerance:
+            region = dict(config[f"{name}_region"])
+            region["left"] += drift[0]
+            region["top"] += drift[1]
+            fixes[f"{name}_region"] = region
+    if fixes and args.fix:
+        update_config(fixes, args.config)
+        print(f"Moved {', '.join(fixes)} in {args.config}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Headless entry point: runs the analyzer without the Tkinter UI.
+
+    python cli.py --config config.json --log-file analyzer.log
+
+Regions, latency compensation (and its calibration), preprocessing, the frame ring and telemetry are read from
+config.json (select the regions once with the GUI, or write them by hand).
+Only the standard library is imported up front. The LiveSplit connection is
+started first, and the analyzer (OpenCV, NumPy, OCR backends) is imported
+while it connects. Stop with Ctrl+C.
+"""
+import argparse
+import signal
+import sys
+import threading
+import time
+
+STARTED = time.perf_counter()
+
+from config import CONFIG_FILE, load_config, update_config, region_settings, frame_ring_settings, pipe_source_settings
+from livesplit_client import LiveSplitClient
+from log_queue import LogQueue
+
+
+def frame_size(text):
+    """argparse type for WIDTHxHEIGHT"""
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT (e.g. 1920x1080), got '{text}'")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"frame size must be positive, got '{text}'")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the split analyzer without a GUI")
+    parser.add_argument("--config", default=CONFIG_FILE, help="Config with regions and latency settings")
+    parser.add_argument("--log-file", default="analyzer.log", help="Append log lines to this file ('' to disable)")
+    parser.add_argument("--log-level", default=None, help="debug, info, warning or error (default: config 'log_level' or info)")
+    parser.add_argument("--host", default="localhost", help="LiveSplit Server host")
+    parser.add_argument("--port", type=int, default=16834, help="LiveSplit Server port")
+    parser.add_argument("--ocr-backend", default="auto", help="tesserocr, capi, pytesseract or auto")
+    parser.add_argument("--serial", action="store_true", help="Capture and OCR in one thread instead of the pipeline")
+    parser.add_argument("--pipe", default=None, help="Read raw BGR frames from this FIFO ('-' for stdin) instead of the screen")
+    parser.add_argument("--pipe-size", type=frame_size, default=None, help="WIDTHxHEIGHT of the piped frames (default: config 'pipe_source')")
+    parser.add_argument("--latency-calibration", choices=["off", "calibrate", "auto"], default=None,
+                        help="Measure the delay to LiveSplit and set latency_compensation (default: config 'latency_calibration' or off)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    regions = region_settings(config)
+    if not regions["timer_region"] or not regions["gametype_region"] or not regions["level_region"]:
+        print(f"Timer, game type and level regions must be set in {args.config}", flush=True)
+        return 1
+
+    pipe = pipe_source_settings(config) or {}
+    if args.pipe:
+        pipe['path'] = args.pipe
+    if args.pipe_size:
+        pipe['width'], pipe['height'] = args.pipe_size
+    if pipe and not all(pipe.get(key) for key in ('path', 'width', 'height')):
+        print("A pipe source needs a path and the frame size (--pipe and --pipe-size)", flush=True)
+        return 1
+
+    logs = LogQueue(args.log_level or config.get('log_level', 'info'))
+    if args.log_file:
+        logs.add_file(args.log_file)
+
+    # Connect in the background while the analyzer modules load
+    livesplit = LiveSplitClient(args.host, args.port)
+    threading.Thread(target=livesplit.connect, daemon=True).start()
+
+    import_start = time.perf_counter()
+    from analyzer import Analyzer
+    from frame_ring import FrameRing
+    from frame_source import PipeFrameSource
+    from telemetry import TelemetryStore
+    import_time = time.perf_counter() - import_start
+
+    analyzer = Analyzer(
+        livesplit,
+        log_queue=logs,
+        latency_compensation=config.get('latency_compensation', 0.1),
+        ocr_backend=args.ocr_backend,
+        pipelined=not args.serial,
+        frame_source=PipeFrameSource(**pipe) if pipe else None,
+        capture_backend=config.get('capture_backend', 'auto'),
+        latency_calibration=args.latency_calibration or config.get('latency_calibration', 'off'),
+        preprocess_config=config.get('preprocess'),
+        route=config.get('route'),
+        **regions
+    )
+    ring = frame_ring_settings(config)
+    if ring:
+        analyzer.frame_ring = FrameRing(**ring)
+    if config.get('telemetry'):
+        analyzer.set_telemetry(TelemetryStore(config['telemetry']))
+    analyzer.log(f"Analyzer imported in {import_time:.2f}s, ready {time.perf_counter() - STARTED:.2f}s after start")
+
+    def stop(signum, frame):
+        analyzer.stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        analyzer.process_loop()
+    finally:
+        livesplit.close()
+        if pipe:
+            analyzer.log(f"Pipe source: {analyzer.frame_source.stats()}")
+        if analyzer.latency.adjustments:
+            # Keep the measured compensation for the next session
+            update_config({'latency_compensation': analyzer.latency_compensation}, args.config)
+            analyzer.log(f"Latency compensation {analyzer.latency_compensation:.3f}s saved to {args.config}")
+        if analyzer.telemetry:
+            analyzer.telemetry.close()
+        logs.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
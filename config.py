@@ -0,0 +1,49 @@
+"""
+Reading config.json without importing the analyzer (and its OpenCV/NumPy stack),
+shared by the GUI, the headless CLI and offline analysis.
+"""
+import json
+import os
+
+CONFIG_FILE = "config.json"
+REGION_NAMES = ("countdown", "gametype", "timer", "level")
+
+
+def load_config(path=CONFIG_FILE):
+    """The config dict, {} when the file does not exist"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def update_config(updates, path=CONFIG_FILE):
+    """Merge settings into the config file, keeping every other key (written to a temp file, then swapped in)"""
+    try:
+        config = load_config(path)
+    except ValueError:
+        config = {}  # Unreadable file, start over
+    config.update(updates)
+    temp = path + ".tmp"
+    with open(temp, 'w') as f:
+        json.dump(config, f, indent=2)
+    os.replace(temp, path)
+
+
+def region_settings(config):
+    """Analyzer keyword arguments for the capture regions (missing regions are None)"""
+    return {f"{name}_region": config.get(f"{name}_region") for name in REGION_NAMES}
+
+
+def frame_ring_settings(config):
+    """FrameRing keyword arguments from "frame_ring": a path or {"path": ..., "minutes": ...}. None when disabled."""
+    ring = config.get('frame_ring')
+    if not ring:
+        return None
+    return {'path': ring} if isinstance(ring, str) else dict(ring)
+
+
+def pipe_source_settings(config):
+    """PipeFrameSource keyword arguments from "pipe_source": {"path": ..., "width": ..., "height": ...}. None when not set."""
+    pipe = config.get('pipe_source')
+    return dict(pipe) if pipe else None
@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+from digit_templates import GlyphTemplates, normalize_glyph
+
+COUNTDOWN_DIGITS = ("1", "2", "3")
+
+
+class CountdownDetector:
+    """
+    OCR-free classifier for the big centred countdown digit (3, 2, 1).
+    Works on a downscaled binary image: the largest contour near the centre is
+    taken as the digit and matched against three stored templates, learned from
+    frames where Tesseract read a countdown digit. Templates are only trusted once
+    all three digits are learned (an unlearned digit would otherwise match its
+    nearest learned one) and when the best one beats the others by min_margin.
+    Before a template exists, a tall and narrow solid blob is recognized as "1"
+    from its shape alone, and that blob becomes the "1" template.
+    """
+
+    def __init__(self, template_path="countdown_templates.npz", downscale=4, threshold=140, min_confidence=0.8, min_area_ratio=0.02, min_margin=0.05, autosave=True):
+        self.template_path = template_path
+        self.autosave = autosave  # Save as soon as a new digit is learned
+        self.downscale = downscale
+        self.threshold = threshold
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin  # Correlation the best template needs over the second best
+        self.min_area_ratio = min_area_ratio  # Smaller blobs are noise, not the digit
+        self.bank = GlyphTemplates()
+        self.bank.load(template_path)
+        self.last_binary = None  # Downscaled binary image of the last detect() call
+
+    def _binary(self, img):
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (max(1, w // self.downscale), max(1, h // self.downscale)), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        _, binary = cv2.threshold(small, self.threshold, 255, cv2.THRESH_BINARY)
+        return binary
+
+    def _digit_blob(self, binary):
+        """Crop of the largest blob, favouring the centre of the region. None when there is none."""
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+
+        h, w = binary.shape
+        cx, cy = w / 2.0, h / 2.0
+        best, best_score = None, 0.0
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area < self.min_area_ratio * h * w:
+                continue
+            x, y, bw, bh = cv2.boundingRect(contour)
+            # Distance of the blob centre from the region centre, 0 (centre) .. ~1 (corner)
+            offset = np.hypot((x + bw / 2.0 - cx) / w, (y + bh / 2.0 - cy) / h) * 2
+            score = area * max(0.0, 1.0 - offset)
+            if score > best_score:
+                best, best_score = (x, y, bw, bh), score
+        if best is None:
+            return None
+        x, y, bw, bh = best
+        return binary[y:y + bh, x:x + bw]
+
+    @staticmethod
+    def _looks_like_one(glyph):
+        h, w = glyph.shape
+        extent = np.count_nonzero(glyph) / float(h * w)  # How solid the bounding box is
+        return h / float(w) > 2.2 and extent > 0.55
+
+    def detect(self, img):
+        """
+        Returns (digit, confidence). digit is "" when no countdown is visible
+        (confidently, confidence 1.0) or when the blob could not be classified
+        (confidence below min_confidence: fall back to OCR).
+        """
+        self.last_binary = self._binary(img)
+        glyph = self._digit_blob(self.last_binary)
+        if glyph is None:
+            return "", 1.0
+
+        confidence = 0.0
+        if all(digit in self.bank.chars for digit in COUNTDOWN_DIGITS):
+            scores = self.bank.templates @ normalize_glyph(glyph)
+            order = np.argsort(scores)[::-1]
+            best, second = float(scores[order[0]]), float(scores[order[1]])
+            if best >= self.min_confidence and best - second >= self.min_margin:
+                return self.bank.chars[order[0]], best
+            confidence = best if best < self.min_confidence else 0.0  # Ambiguous: let OCR decide
+
+        if "1" not in self.bank.chars and self._looks_like_one(glyph):
+            # Never sent to OCR, so this is the only frame "1" can be learned from
+            self._add("1", glyph)
+            return "1", self.min_confidence
+        return "", confidence
+
+    def is_confident(self, confidence):
+        return confidence >= self.min_confidence
+
+    def learn(self, img, text):
+        """Learn a template from a frame Tesseract read as a countdown digit"""
+        if text not in COUNTDOWN_DIGITS:
+            return False
+        glyph = self._digit_blob(self._binary(img))
+        if glyph is None:
+            return False
+        self._add(text, glyph)
+        return True
+
+    def _add(self, digit, glyph):
+        is_new = digit not in self.bank.chars
+        self.bank.add_sample(digit, normalize_glyph(glyph))
+        if is_new and self.autosave:
+            self.save()
+
+    def save(self):
+        if not len(self.bank):
+            return
+        try:
+            self.bank.save(self.template_path)
+        except OSError as e:
+            print(f"Failed to save countdown templates: {e}", flush=True)
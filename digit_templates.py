@@ -0,0 +1,177 @@
+import os
+import re
+import cv2
+import numpy as np
+
+# Every glyph is normalized to this size (width, height) before matching
+GLYPH_SIZE = (16, 24)
+
+# A timer read is only used for learning when it is a complete MM:SS / M:SS string
+CONFIRMED_TIMER_PATTERN = re.compile(r'^\d{1,2}:\d{2}$')
+
+# Characters the timer bank must hold before its reads are trusted
+TIMER_CHARS = "0123456789:"
+
+
+def normalize_glyph(glyph):
+    """Resize a binary glyph crop to GLYPH_SIZE and return it as a zero-mean, unit-norm vector"""
+    vec = cv2.resize(glyph, GLYPH_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    vec -= vec.mean()
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+def segment_glyphs(thresh, min_pixels=4):
+    """
+    Split a thresholded image (white text on black) into glyphs, left to right.
+    Glyphs are separated by empty columns, so the two dots of a ':' stay together.
+    Returns a list of cropped binary glyph images.
+    """
+    columns = np.count_nonzero(thresh, axis=0) > 0
+    if not columns.any():
+        return []
+
+    # Start/end indices of runs of non-empty columns
+    edges = np.diff(np.concatenate(([0], columns.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    glyphs = []
+    for x0, x1 in zip(starts, ends):
+        strip = thresh[:, x0:x1]
+        rows = np.flatnonzero(np.count_nonzero(strip, axis=1))
+        glyph = strip[rows[0]:rows[-1] + 1]
+        if np.count_nonzero(glyph) < min_pixels:
+            continue  # Speck of noise
+        glyphs.append(glyph)
+    return glyphs
+
+
+class GlyphTemplates:
+    """
+    A bank of averaged glyph templates, one per character.
+    Matching is a single matrix product between normalized glyph vectors and templates.
+    """
+    MAX_WEIGHT = 50  # Cap on the running-average weight so templates keep adapting slowly
+
+    def __init__(self):
+        self.chars = []
+        self.templates = np.zeros((0, GLYPH_SIZE[0] * GLYPH_SIZE[1]), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.chars)
+
+    def add_sample(self, char, vec):
+        """Fold one normalized glyph vector into the template for char"""
+        if char in self.chars:
+            i = self.chars.index(char)
+            weight = min(self.counts[i], self.MAX_WEIGHT)
+            template = (self.templates[i] * weight + vec) / (weight + 1)
+            template -= template.mean()
+            norm = np.linalg.norm(template)
+            self.templates[i] = template / norm if norm > 0 else template
+            self.counts[i] += 1
+        else:
+            self.chars.append(char)
+            self.templates = np.vstack([self.templates, vec[np.newaxis]])
+            self.counts = np.append(self.counts, 1).astype(np.int32)
+
+    def match(self, vectors):
+        """
+        Classify a (n, D) array of normalized glyph vectors.
+        Returns (chars, scores) where scores are correlations in [-1, 1].
+        """
+        if not self.chars or len(vectors) == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        scores = vectors @ self.templates.T
+        best = scores.argmax(axis=1)
+        return [self.chars[i] for i in best], scores[np.arange(len(best)), best]
+
+    def save(self, path):
+        np.savez(path, chars=np.array(self.chars), templates=self.templates, counts=self.counts)
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        data = np.load(path)
+        self.chars = [str(c) for c in data["chars"]]
+        self.templates = data["templates"].astype(np.float32)
+        self.counts = data["counts"].astype(np.int32)
+        return True
+
+
+class DigitTemplateRecognizer:
+    """
+    Reads the MM:SS timer by matching glyphs against digit templates.
+    Templates are learned from frames whose Tesseract read was confirmed and
+    persisted to template_path so later startups can skip learning. A read is
+    only trusted once every timer character has a template (a glyph without one
+    scores high against a similar digit, e.g. 8 vs 0), every glyph beats its
+    second-best template by min_margin and the text is a complete MM:SS.
+    """
+
+    def __init__(self, template_path="timer_templates.npz", min_confidence=0.85, min_margin=0.04, autosave=True):
+        self.template_path = template_path
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin  # Correlation the best template needs over the second best
+        self.autosave = autosave  # Save as soon as a new character is learned
+        self.bank = GlyphTemplates()
+        self.dirty = False
+        if self.bank.load(template_path):
+            print(f"Loaded timer templates for '{''.join(sorted(self.bank.chars))}' from {template_path}", flush=True)
+
+    def recognize(self, thresh):
+        """
+        Returns (text, confidence). Confidence is the worst glyph correlation,
+        0.0 when nothing could be matched or the read is not trusted.
+        """
+        glyphs = segment_glyphs(thresh)
+        if not glyphs or not self.complete():
+            return "", 0.0
+        vectors = np.stack([normalize_glyph(g) for g in glyphs])
+        scores = vectors @ self.bank.templates.T
+        order = np.argsort(scores, axis=1)
+        rows = np.arange(len(glyphs))
+        best, second = scores[rows, order[:, -1]], scores[rows, order[:, -2]]
+        text = "".join(self.bank.chars[i] for i in order[:, -1])
+        if (best - second).min() < self.min_margin or not CONFIRMED_TIMER_PATTERN.match(text):
+            return text, 0.0
+        return text, float(best.min())
+
+    def complete(self):
+        """True once every timer character has a template"""
+        return all(char in self.bank.chars for char in TIMER_CHARS)
+
+    def is_confident(self, confidence):
+        return confidence >= self.min_confidence
+
+    def learn(self, thresh, text):
+        """
+        Learn from a confirmed Tesseract read. Returns True when the glyphs
+        lined up with the characters and templates were updated.
+        """
+        text = text.replace(" ", "")
+        if not CONFIRMED_TIMER_PATTERN.match(text):
+            return False
+        glyphs = segment_glyphs(thresh)
+        if len(glyphs) != len(text):
+            return False  # Segmentation disagrees with the read, don't trust it
+        for char, glyph in zip(text, glyphs):
+            if char not in self.bank.chars:
+                self.dirty = True  # New character, worth saving right away
+            self.bank.add_sample(char, normalize_glyph(glyph))
+        if self.dirty and self.autosave:
+            self.save()
+        return True
+
+    def save(self):
+        if not len(self.bank):
+            return
+        try:
+            self.bank.save(self.template_path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Failed to save timer templates: {e}", flush=True)
@@ -0,0 +1,235 @@
+"""
+Local stand-in for the LiveSplit Server component, to run LiveSplitClient and
+the analyzer without LiveSplit (e.g. on Linux, see soak.py).
+
+Speaks the LiveSplit Server text protocol (one command per line) and keeps a
+minimal timer: starttimer, split, skipsplit, unsplit, reset, pause, resume,
+setgametime, pausegametime, unpausegametime and the getcurrenttime,
+getgametime, getsplitindex and getcurrenttimerphase queries. Every command is
+recorded with its arrival time; setgametime arrives many times per second, so
+it is counted, and only the other commands are kept as events.
+
+    python fake_livesplit.py --port 16834 --log commands.jsonl
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from collections import Counter, deque
+
+NOT_RUNNING = "NotRunning"
+RUNNING = "Running"
+ENDED = "Ended"
+PAUSED = "Paused"
+
+
+def format_time(seconds):
+    """LiveSplit-style time: "1:02:03.45", "2:03.45" or "3.45"; "-" when there is no time"""
+    if seconds is None:
+        return "-"
+    sign = "-" if seconds < 0 else ""
+    seconds = abs(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    if hours >= 1:
+        return f"{sign}{int(hours)}:{int(minutes):02d}:{rest:05.2f}"
+    if minutes >= 1:
+        return f"{sign}{int(minutes)}:{rest:05.2f}"
+    return f"{sign}{rest:.2f}"
+
+
+class FakeTimer:
+    """The part of LiveSplit's timer model the analyzer uses"""
+
+    def __init__(self, segments=None):
+        self.segments = segments  # Splits that end the run, None = never ends
+        self.reset()
+
+    def reset(self):
+        self.phase = NOT_RUNNING
+        self.started = None
+        self.paused_at = None
+        self.pause_time = 0.0
+        self.split_index = -1
+        self.loading = 0.0  # Real time - game time
+        self.gametime_paused_at = None
+
+    def real_time(self, now):
+        if self.started is None:
+            return None
+        end = self.paused_at if self.paused_at is not None else now
+        return end - self.started - self.pause_time
+
+    def game_time(self, now):
+        if self.gametime_paused_at is not None:
+            return self.gametime_paused_at
+        real = self.real_time(now)
+        return None if real is None else real - self.loading
+
+    def command(self, name, argument, now):
+        if name == "starttimer" and self.phase == NOT_RUNNING:
+            self.phase, self.started, self.split_index = RUNNING, now, 0
+        elif name == "split" and self.phase == RUNNING:
+            self.split_index += 1
+            if self.segments and self.split_index >= self.segments:
+                self.phase, self.paused_at = ENDED, now
+        elif name == "skipsplit" and self.phase == RUNNING:
+            self.split_index += 1
+        elif name == "unsplit" and self.phase in (RUNNING, ENDED) and self.split_index > 0:
+            self.split_index -= 1
+            if self.phase == ENDED:
+                self.pause_time += now - self.paused_at
+                self.phase, self.paused_at = RUNNING, None
+        elif name == "reset":
+            self.reset()
+        elif name == "pause" and self.phase == RUNNING:
+            self.phase, self.paused_at = PAUSED, now
+        elif name == "resume" and self.phase == PAUSED:
+            self.pause_time += now - self.paused_at
+            self.phase, self.paused_at = RUNNING, None
+        elif name == "setgametime" and self.started is not None:
+            try:
+                seconds = float(argument)
+            except ValueError:
+                return  # LiveSplit ignores unparsable times too
+            if self.gametime_paused_at is not None:
+                self.gametime_paused_at = seconds
+            else:
+                self.loading = self.real_time(now) - seconds
+        elif name == "pausegametime" and self.gametime_paused_at is None:
+            self.gametime_paused_at = self.game_time(now)
+        elif name == "unpausegametime" and self.gametime_paused_at is not None:
+            self.loading = self.real_time(now) - self.gametime_paused_at
+            self.gametime_paused_at = None
+
+    def query(self, name, now):
+        """Reply line of a get* command, None for commands without a reply"""
+        if name == "getcurrenttime":
+            return format_time(self.real_time(now))
+        if name == "getgametime":
+            return format_time(self.game_time(now))
+        if name == "getsplitindex":
+            return str(self.split_index)
+        if name == "getcurrenttimerphase":
+            return self.phase
+        return None
+
+
+class FakeLiveSplitServer:
+    """Threaded TCP server recording every command. Port 0 picks a free port (see .port)."""
+    MAX_EVENTS = 100000
+
+    def __init__(self, host="127.0.0.1", port=16834, segments=None, log_path=None):
+        self.host = host
+        self.port = port
+        self.timer = FakeTimer(segments)
+        self.lock = threading.Lock()
+        self.events = deque(maxlen=self.MAX_EVENTS)  # {"time", "command", "argument", ...} except setgametime
+        self.counts = Counter()
+        self.total = 0
+        self.last_gametime = None
+        self.log_file = open(log_path, 'a', encoding='utf-8') if log_path else None
+        self.server = None
+        self.thread = None
+        self.connections = 0
+
+    def start(self):
+        self.server = socket.create_server((self.host, self.port))
+        self.port = self.server.getsockname()[1]
+        self.thread = threading.Thread(target=self._accept_loop, name="fake-livesplit", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.close()
+            self.server = None
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+    def _accept_loop(self):
+        while self.server:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), name="fake-livesplit-conn", daemon=True).start()
+
+    def _serve(self, conn):
+        with conn, conn.makefile('rb') as lines:
+            for line in lines:
+                reply = self.handle(line.decode('utf-8', 'replace').strip())
+                if reply is not None:
+                    try:
+                        conn.sendall((reply + "\r\n").encode('utf-8'))
+                    except OSError:
+                        return
+
+    def handle(self, line, now=None):
+        """Apply one command line; returns the reply for queries"""
+        if not line:
+            return None
+        now = time.time() if now is None else now
+        name, _, argument = line.partition(" ")
+        with self.lock:
+            self.timer.command(name, argument, now)
+            reply = self.timer.query(name, now)
+            self.counts[name] += 1
+            self.total += 1
+            if name == "setgametime":
+                self.last_gametime = argument
+                return reply
+            event = {"time": round(now, 4), "command": name, "argument": argument or None,
+                     "split_index": self.timer.split_index, "phase": self.timer.phase,
+                     "gametime": self.last_gametime}
+            if reply is not None:
+                event["reply"] = reply
+            self.events.append(event)
+            if self.log_file:
+                self.log_file.write(json.dumps(event) + "\n")
+                self.log_file.flush()
+        return reply
+
+    def commands(self, name=None):
+        """Recorded events, optionally only one command"""
+        with self.lock:
+            return [event for event in self.events if name is None or event["command"] == name]
+
+    def stats(self):
+        with self.lock:
+            return {"total": self.total, "connections": self.connections, "counts": dict(self.counts),
+                    "phase": self.timer.phase, "split_index": self.timer.split_index}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the LiveSplit Server, recording every command")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=16834)
+    parser.add_argument("--segments", type=int, default=None, help="Splits that end a run (default: runs never end)")
+    parser.add_argument("--log", default=None, help="Append every command except setgametime to this JSONL file")
+    args = parser.parse_args()
+
+    server = FakeLiveSplitServer(args.host, args.port, args.segments, args.log).start()
+    print(f"Fake LiveSplit Server listening on {args.host}:{server.port} (Ctrl+C to stop)", flush=True)
+    last = 0.0
+    try:
+        while True:
+            time.sleep(0.5)
+            for event in server.commands():
+                if event['time'] <= last:
+                    continue
+                last = event['time']
+                print(f"  {time.strftime('%H:%M:%S', time.localtime(event['time']))} {event['command']}"
+                      f"{' ' + event['argument'] if event['argument'] else ''}  (game time {event['gametime']})", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"Commands received: {server.stats()['counts']}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
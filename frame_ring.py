@@ -0,0 +1,200 @@
+"""
+Memory-mapped ring buffer of recent region frames for post-mortem debugging.
+
+The analyzer writes every thresholded region bitmap it recognizes, with its
+capture time and recognized text, into a fixed-size file. Bitmaps are stored
+bit-packed (1 bit per pixel) so a few minutes of frames fit in a few tens of
+MB, and a write is a packbits + memcpy into the mapped file. The OS flushes
+pages in the background; the loop never waits for the disk.
+
+Dump a time window after a missed split:
+
+    python frame_ring.py frame_ring.bin --last 30 --out ring_dump
+    python frame_ring.py frame_ring.bin --last 30 --video --out ring_dump
+"""
+import argparse
+import os
+import threading
+import numpy as np
+
+MAGIC = b"ZSRING01"
+TEXT_BYTES = 32
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("capacity", "<u8"),
+    ("max_bytes", "<u4"),
+    ("next_seq", "<u8"),  # Sequence number of the next record (0 = empty slot)
+])
+
+
+def record_dtype(max_bytes):
+    return np.dtype([
+        ("seq", "<u8"),
+        ("time", "<f8"),
+        ("region", "S12"),
+        ("height", "<u2"),
+        ("width", "<u2"),
+        ("text", f"S{TEXT_BYTES}"),
+        ("bits", "u1", (max_bytes,)),
+    ])
+
+
+class FrameRing:
+    """
+    Fixed-size ring of (time, region, text, bitmap) records in a memory-mapped file.
+    Capacity defaults to `minutes` of frames at `rate` records per second
+    (all regions combined). Bitmaps larger than max_bytes are decimated to fit.
+    An existing ring with the same layout is continued, otherwise it is recreated.
+    """
+
+    def __init__(self, path="frame_ring.bin", minutes=5.0, rate=20.0, max_bytes=8192):
+        self.path = path
+        self.capacity = max(1, int(minutes * 60 * rate))
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        dtype = record_dtype(max_bytes)
+        size = HEADER_DTYPE.itemsize + dtype.itemsize * self.capacity
+        reuse = os.path.exists(path) and os.path.getsize(path) == size
+        self.header = np.memmap(path, dtype=HEADER_DTYPE, mode="r+" if reuse else "w+", shape=(1,))
+        self.records = np.memmap(path, dtype=dtype, mode="r+", offset=HEADER_DTYPE.itemsize, shape=(self.capacity,))
+        if not reuse or self.header["magic"][0] != MAGIC:
+            if reuse:
+                self.records["seq"] = 0  # Same size but not a ring: mark every slot empty
+            self.header[0] = (MAGIC, self.capacity, max_bytes, 1)
+
+        # Counters
+        self.written = 0
+        self.decimated = 0
+
+    def write(self, capture_time, region, binary, text):
+        """Store one thresholded (0/255) region bitmap"""
+        if binary is None or binary.ndim != 2 or not binary.size:
+            return
+        step = 1
+        while -(-binary.shape[0] // step) * -(-binary.shape[1] // step) > self.max_bytes * 8:
+            step += 1
+        if step > 1:
+            binary = binary[::step, ::step]
+            self.decimated += 1
+        h, w = binary.shape
+        packed = np.packbits(binary > 127)
+
+        with self.lock:
+            seq = int(self.header["next_seq"][0])
+            self.header["next_seq"][0] = seq + 1
+            i = seq % self.capacity
+            records = self.records
+            records["seq"][i] = seq
+            records["time"][i] = capture_time
+            records["region"][i] = region.encode("ascii", "replace")[:12]
+            records["height"][i] = h
+            records["width"][i] = w
+            records["text"][i] = text.encode("utf-8", "replace")[:TEXT_BYTES]
+            records["bits"][i, :packed.size] = packed
+            self.written += 1
+
+    def flush(self):
+        self.header.flush()
+        self.records.flush()
+
+    def close(self):
+        self.flush()
+
+    def stats(self):
+        return {"written": self.written, "decimated": self.decimated, "capacity": self.capacity}
+
+
+def read_ring(path):
+    """All stored records of a ring file in write order"""
+    header = np.memmap(path, dtype=HEADER_DTYPE, mode="r", shape=(1,))[0]
+    if header["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a frame ring file")
+    records = np.memmap(path, dtype=record_dtype(int(header["max_bytes"])), mode="r",
+                        offset=HEADER_DTYPE.itemsize, shape=(int(header["capacity"]),))
+    used = records[records["seq"] > 0]
+    return used[np.argsort(used["seq"])]
+
+
+def unpack(record):
+    """Bitmap (uint8, 0/255) of one record"""
+    h, w = int(record["height"]), int(record["width"])
+    bits = np.unpackbits(record["bits"], count=h * w)
+    return (bits.reshape(h, w) * 255).astype(np.uint8)
+
+
+def select(records, start=None, end=None, last=None, region=None):
+    """Records inside a time window; `last` is seconds before the newest record"""
+    if not len(records):
+        return records
+    if last is not None:
+        start = float(records["time"].max()) - last
+    mask = np.ones(len(records), dtype=bool)
+    if start is not None:
+        mask &= records["time"] >= start
+    if end is not None:
+        mask &= records["time"] <= end
+    if region:
+        mask &= records["region"] == region.encode("ascii")
+    return records[mask]
+
+
+def dump_images(records, out_dir):
+    import cv2
+    os.makedirs(out_dir, exist_ok=True)
+    for record in records:
+        region = record["region"].decode("ascii")
+        text = record["text"].decode("utf-8", "replace")
+        safe_text = "".join(c if c.isalnum() else "_" for c in text)
+        name = f"{record['time']:.3f}_{region}_{safe_text}.png"
+        cv2.imwrite(os.path.join(out_dir, name), unpack(record))
+    print(f"Wrote {len(records)} images to {out_dir}", flush=True)
+
+
+def dump_videos(records, out_dir, fps=10.0):
+    """One video per region, frames padded to the largest bitmap and captioned with the text"""
+    import cv2
+    os.makedirs(out_dir, exist_ok=True)
+    for region in sorted(set(records["region"])):
+        frames = records[records["region"] == region]
+        h = int(frames["height"].max()) + 24
+        w = max(int(frames["width"].max()), 160)
+        path = os.path.join(out_dir, f"{region.decode('ascii')}.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+        canvas = np.zeros((h, w, 3), dtype=np.uint8)
+        for record in frames:
+            bitmap = unpack(record)
+            canvas[:] = 0
+            canvas[24:24 + bitmap.shape[0], :bitmap.shape[1]] = bitmap[:, :, np.newaxis]
+            caption = f"{record['time']:.2f} {record['text'].decode('utf-8', 'replace')}"
+            cv2.putText(canvas, caption, (2, 17), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 0), 1)
+            writer.write(canvas)
+        writer.release()
+        print(f"Wrote {len(frames)} frames to {path}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump region frames from a frame ring file")
+    parser.add_argument("ring", nargs="?", default="frame_ring.bin")
+    parser.add_argument("--start", type=float, help="Window start (epoch seconds)")
+    parser.add_argument("--end", type=float, help="Window end (epoch seconds)")
+    parser.add_argument("--last", type=float, help="Seconds before the newest frame")
+    parser.add_argument("--region", help="Only this region")
+    parser.add_argument("--out", default="ring_dump", help="Output directory")
+    parser.add_argument("--video", action="store_true", help="Write one video per region instead of images")
+    parser.add_argument("--fps", type=float, default=10.0, help="Video frame rate")
+    args = parser.parse_args()
+
+    records = select(read_ring(args.ring), args.start, args.end, args.last, args.region)
+    if not len(records):
+        print("No frames in that window", flush=True)
+        return
+    if args.video:
+        dump_videos(records, args.out, args.fps)
+    else:
+        dump_images(records, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+import glob
+import os
+import select
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+import cv2
+import numpy as np
+
+
+def union_region(regions):
+    """Bounding box (mss monitor dict) covering all given regions"""
+    left = min(int(r['left']) for r in regions)
+    top = min(int(r['top']) for r in regions)
+    right = max(int(r['left']) + int(r['width']) for r in regions)
+    bottom = max(int(r['top']) + int(r['height']) for r in regions)
+    return {"top": top, "left": left, "width": right - left, "height": bottom - top}
+
+
+def wall_time(capture_time):
+    """Wall-clock time (for display and storage) of a live frame stamped with time.monotonic()"""
+    return time.time() - (time.monotonic() - capture_time)
+
+
+def slice_regions(frame, regions, origin_left=0, origin_top=0):
+    """Slice views of every region out of a frame whose top-left pixel is (origin_left, origin_top)"""
+    views = {}
+    for name, region in regions.items():
+        y = int(region['top']) - origin_top
+        x = int(region['left']) - origin_left
+        views[name] = frame[y:y + int(region['height']), x:x + int(region['width'])]
+    return views
+
+
+class FrameSource:
+    """
+    Where the Analyzer gets its pixels from.
+    grab(regions) returns (capture_time, {name: image}) or None once the source is exhausted.
+    Live sources stamp frames with time.monotonic(), so a clock step (NTP) during a
+    run does not move the game time (see wall_time() for display and storage);
+    recorded sources use the media time and set realtime = False so the
+    analyzer's cooldowns follow the recording.
+    """
+    realtime = True
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def grab(self, regions):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MssCapture:
+    """Screen grabs through mss (XGetImage on Linux): a new screenshot buffer per grab"""
+    name = "mss"
+
+    def __init__(self):
+        self.sct = None
+
+    def open(self):
+        import mss
+        self.sct = mss.mss()
+
+    def close(self):
+        if self.sct:
+            self.sct.close()
+            self.sct = None
+
+    def grab(self, bbox):
+        shot = self.sct.grab(bbox)
+        # Wrap the screenshot's raw BGRA bytes without copying them
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+
+CAPTURE_BACKENDS = ("auto", "xshm", "mss")
+
+
+def open_capture(backend="auto"):
+    """
+    Opened screen capture for a "capture_backend" setting. "auto" uses X11
+    MIT-SHM (xshm_capture.py) when available and falls back to mss.
+    """
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(f"Unknown capture backend '{backend}' (expected one of {', '.join(CAPTURE_BACKENDS)})")
+    if backend == "xshm" or (backend == "auto" and sys.platform.startswith("linux") and os.environ.get("DISPLAY")):
+        from xshm_capture import XShmCapture
+        capture = XShmCapture()
+        try:
+            capture.open()
+            return capture
+        except (OSError, RuntimeError) as e:
+            if backend == "xshm":
+                raise
+            print(f"MIT-SHM capture unavailable ({e}), using mss", flush=True)
+    capture = MssCapture()
+    capture.open()
+    return capture
+
+
+class ScreenFrameSource(FrameSource):
+    """Live screen capture (MIT-SHM or mss, see open_capture)"""
+
+    def __init__(self, union=True, backend="auto"):
+        # Grab the bounding box of all requested regions in one call per frame
+        # instead of one grab per region
+        self.union = union
+        self.backend = backend
+        self.capture = None
+
+    def open(self):
+        # Capture handles are per-thread, so open() must run in the capturing thread
+        self.capture = open_capture(self.backend)
+
+    def close(self):
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+
+    def capture_frame(self, region):
+        if not region:
+            return None
+
+        # mss requires int
+        monitor = {
+            "top": int(region['top']),
+            "left": int(region['left']),
+            "width": int(region['width']),
+            "height": int(region['height'])
+        }
+        return cv2.cvtColor(self.capture.grab(monitor), cv2.COLOR_BGRA2BGR)
+
+    def grab(self, regions):
+        """
+        In union mode a single grab of the bounding box is made and every region is
+        a BGRA slice view of that buffer, so all regions share one capture timestamp
+        and nothing is copied (with MIT-SHM nothing is allocated either).
+        """
+        if not regions:
+            return time.monotonic(), {}
+
+        if not self.union:
+            capture_time = time.monotonic()
+            return capture_time, {name: self.capture_frame(region) for name, region in regions.items()}
+
+        bbox = union_region(regions.values())
+        capture_time = time.monotonic()
+        frame = self.capture.grab(bbox)
+        return capture_time, slice_regions(frame, regions, bbox['left'], bbox['top'])
+
+
+class PipeFrameSource(FrameSource):
+    """
+    Live raw BGR frames from a pipe or FIFO, e.g. an OBS/ffmpeg feed on a capture PC:
+
+        ffmpeg -i <input> -f rawvideo -pix_fmt bgr24 -s 1920x1080 /tmp/feed   (or "-" and pipe into stdin)
+
+    A reader thread drains the pipe continuously, so the writer never stalls and
+    grab() always gets the newest frame. Frames are read with readinto() into
+    preallocated buffers, each wrapped once with np.frombuffer; regions are views
+    sliced out of them (region coordinates are in video pixels). The frames
+    returned by the last HOLD grabs are never overwritten, as the pipeline may
+    still be OCR'ing them.
+    Every open() starts a reader bound to its own pipe object and generation;
+    a reader whose generation is over never publishes a frame.
+    Counters: dropped = frames replaced by a newer one before the analyzer took
+    them, backlog = frames' worth of data waiting in the pipe (the reader falling behind).
+    """
+    SLOTS = 8
+    HOLD = 5  # Pipeline: 3 frames queued + 1 processed + 1 being submitted
+    POLL = 0.5  # Seconds a reader waits for data before checking whether it was closed
+
+    def __init__(self, path, width, height, timeout=2.0):
+        self.path = path
+        self.width = int(width)
+        self.height = int(height)
+        self.frame_bytes = self.width * self.height * 3
+        self.timeout = timeout  # Seconds grab() waits for a frame before trying again
+        self.pipe = None
+        self.buffers = []
+        self.frames = []  # np.frombuffer views of the buffers, (height, width, 3)
+        self.times = [0.0] * self.SLOTS  # Arrival time of the frame in each slot
+        self.cond = threading.Condition()
+        self.reader = None
+        self.latest = None  # Slot of the newest complete frame
+        self.latest_seq = 0  # Frames completed so far
+        self.grabbed_seq = 0  # Newest frame seq handed out by grab()
+        self.held = deque(maxlen=self.HOLD)  # Slots of the last grabs
+        self.writing = None  # Slot the reader is filling
+        self.eof = False
+        self.generation = 0  # Incremented by open() and close(), ends the previous reader
+
+        # Counters
+        self.frames_read = 0
+        self.frames_grabbed = 0
+        self.dropped = 0
+        self.last_age = 0.0  # Seconds between a frame's arrival and the grab that took it
+
+    def open(self):
+        if self.reader and self.reader.is_alive():
+            # It would read from the new stream into buffers the new reader fills
+            raise RuntimeError(f"The previous reader of {self.path} is still blocked in a read; restart the feed")
+        if self.path == "-":
+            pipe = open(sys.stdin.fileno(), 'rb', buffering=0, closefd=False)
+        else:
+            pipe = open(self.path, 'rb', buffering=0)  # Blocks until a writer opens a FIFO
+        if not self.buffers:
+            self.buffers = [bytearray(self.frame_bytes) for _ in range(self.SLOTS)]
+            self.frames = [np.frombuffer(b, dtype=np.uint8).reshape(self.height, self.width, 3) for b in self.buffers]
+        with self.cond:
+            self.generation += 1
+            self.eof = False
+            self.latest, self.writing = None, None
+            self.latest_seq = self.grabbed_seq = 0
+            self.held.clear()
+        self.pipe = pipe
+        self.reader = threading.Thread(target=self._read_loop, args=(pipe, self.generation), name="pipe-reader", daemon=True)
+        self.reader.start()
+
+    def close(self):
+        with self.cond:
+            self.eof = True
+            self.generation += 1
+            self.cond.notify_all()
+        if self.pipe:
+            self.pipe.close()
+            self.pipe = None
+        if self.reader:
+            # The reader notices the new generation within POLL seconds, unless it is
+            # stuck in a read select() cannot watch (e.g. a Windows pipe); open() checks that
+            self.reader.join(timeout=2 * self.POLL + 1)
+            if not self.reader.is_alive():
+                self.reader = None
+
+    def _free_slot(self):
+        return next(i for i in range(self.SLOTS) if i != self.latest and i not in self.held)
+
+    def _wait_readable(self, pipe, generation):
+        """Wait for data on the pipe; False once this reader's generation is over"""
+        while generation == self.generation:
+            try:
+                readable, _, _ = select.select([pipe], [], [], self.POLL)
+            except (OSError, ValueError):
+                return generation == self.generation  # Not selectable here: block in readinto()
+            if readable:
+                return True
+        return False
+
+    def _read_frame(self, pipe, view, generation):
+        """Fill view from the pipe; False at the end of the stream or once the reader was closed"""
+        filled = 0
+        while filled < self.frame_bytes:
+            if not self._wait_readable(pipe, generation):
+                return False
+            n = pipe.readinto(view[filled:])
+            if not n:
+                return False
+            filled += n
+        return True
+
+    def _read_loop(self, pipe, generation):
+        try:
+            while True:
+                with self.cond:
+                    if generation != self.generation:
+                        return
+                    slot = self.writing = self._free_slot()
+                if not self._read_frame(pipe, memoryview(self.buffers[slot]), generation):
+                    break
+                with self.cond:
+                    if generation != self.generation:
+                        return  # Closed during the read, the frame belongs to nobody
+                    if self.latest is not None and self.latest_seq > self.grabbed_seq:
+                        self.dropped += 1  # The previous frame was never grabbed
+                    self.times[slot] = time.monotonic()
+                    self.latest, self.writing = slot, None
+                    self.latest_seq += 1
+                    self.frames_read += 1
+                    self.cond.notify_all()
+        except (OSError, ValueError):
+            pass  # Pipe closed
+        with self.cond:
+            if generation == self.generation:
+                self.eof = True
+                self.cond.notify_all()
+
+    def backlog(self):
+        """Frames' worth of bytes waiting in the pipe, None where the OS can't tell"""
+        try:
+            import fcntl
+            import termios
+            size = array('i', [0])
+            fcntl.ioctl(self.pipe.fileno(), termios.FIONREAD, size)
+            return size[0] / self.frame_bytes
+        except (ImportError, OSError, AttributeError, ValueError):
+            return None
+
+    def grab(self, regions):
+        """
+        Newest frame not grabbed yet (waits for it), None once the stream has ended.
+        When the feed stalls for timeout seconds an empty frame is returned, so the
+        analyzer can still stop and keep sending game time.
+        """
+        with self.cond:
+            if self.latest_seq == self.grabbed_seq and not self.eof:
+                self.cond.wait(self.timeout)
+            if self.latest_seq == self.grabbed_seq:
+                return None if self.eof else (time.monotonic(), {})
+            slot = self.latest
+            self.grabbed_seq = self.latest_seq
+            self.held.append(slot)
+            capture_time = self.times[slot]
+        self.frames_grabbed += 1
+        self.last_age = time.monotonic() - capture_time
+        return capture_time, slice_regions(self.frames[slot], regions)
+
+    def stats(self):
+        return {
+            "read": self.frames_read,
+            "grabbed": self.frames_grabbed,
+            "dropped": self.dropped,
+            "backlog_frames": self.backlog() if self.pipe else None,
+            "last_age_ms": self.last_age * 1000,
+        }
+
+
+class VideoFrameSource(FrameSource):
+    """
+    Frames from a recording (anything cv2.VideoCapture opens).
+    Region coordinates are in video pixels. Only [start, end) seconds are read,
+    and frames are sampled at sample_fps to go faster than real time.
+    """
+    realtime = False
+
+    def __init__(self, path, start=0.0, end=None, sample_fps=10):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.sample_fps = sample_fps
+        self.cap = None
+        self.step = 1
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video: {self.path}")
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.step = max(1, int(round(fps / self.sample_fps))) if self.sample_fps else 1
+        if self.start:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, self.start * 1000.0)
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def duration(self):
+        """Length of the video in seconds"""
+        cap = self.cap or cv2.VideoCapture(self.path)
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            return cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        finally:
+            if cap is not self.cap:
+                cap.release()
+
+    def grab(self, regions):
+        # Skip frames between samples without converting them
+        for _ in range(self.step - 1):
+            if not self.cap.grab():
+                return None
+
+        timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        ok, frame = self.cap.read()
+        if not ok or (self.end is not None and timestamp >= self.end):
+            return None
+        return timestamp, slice_regions(frame, regions)
+
+
+class ImageSequenceFrameSource(FrameSource):
+    """Frames from a sorted PNG sequence (a directory or a glob pattern) played at fps"""
+    realtime = False
+
+    def __init__(self, pattern, fps=30.0, start=0.0, end=None, sample_fps=10):
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.png")
+        self.files = sorted(glob.glob(pattern))
+        self.fps = fps
+        self.start = start
+        self.end = end
+        self.step = max(1, int(round(fps / sample_fps))) if sample_fps else 1
+        self.index = int(start * fps)
+
+    def duration(self):
+        return len(self.files) / self.fps
+
+    def grab(self, regions):
+        if self.index >= len(self.files):
+            return None
+        timestamp = self.index / self.fps
+        if self.end is not None and timestamp >= self.end:
+            return None
+        frame = cv2.imread(self.files[self.index], cv2.IMREAD_COLOR)
+        self.index += self.step
+        if frame is None:
+            return None
+        return timestamp, slice_regions(frame, regions)
+
+
+def open_recording(path, fps=30.0, **kwargs):
+    """Frame source for a video file, a PNG directory or a PNG glob pattern (fps only applies to PNGs)"""
+    if os.path.isdir(path) or any(c in path for c in "*?["):
+        return ImageSequenceFrameSource(path, fps=fps, **kwargs)
+    return VideoFrameSource(path, **kwargs)
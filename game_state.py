@@ -3,16 +3,26 @@ class GameState:
     RUNNING = "RUNNING"
     FINISHED = "FINISHED"
 
-    def __init__(self):
+    # Levels of the EVA Zombies route (route.py can define others)
+    LEVELS = ["Isolation", "Lab", "Top Floor", "Reactor", "Hangar"]
+
+    def __init__(self, level_sequence=None):
         self.state = self.IDLE
         self.current_level = None
         self.start_time = None # The timer value when the run started (e.g., 30:00)
         self.last_timer_value = None
         
         # Define expected level sequence
-        self.level_sequence = ["Isolation", "Lab", "Top Floor", "Reactor", "Hangar"]
+        self.level_sequence = list(level_sequence or self.LEVELS)
         self.current_level_index = -1
 
+        # Optional TelemetryStore recording run starts, level changes and finishes
+        self.telemetry = None
+
+    def record(self, kind, **fields):
+        if self.telemetry is not None:
+            self.telemetry.record(kind, **fields)
+
     def reset(self):
         self.state = self.IDLE
         self.current_level = None
@@ -27,10 +37,11 @@ class GameState:
         self.current_level = self.level_sequence[0] # Assume start at first level
         self.current_level_index = 0
         print(f"Run Started! Initial Timer: {start_timer_value}", flush=True)
+        self.record("run_start", start_timer=start_timer_value)
 
     def set_level(self, level_name):
-        # Clean input
-        level_name = level_name.strip()
+        # Clean input - the analyzer passes canonical names from the banner classifier
+        level_name = level_name.strip().upper()
         
         # Check against ALL future levels to allow skipping/recovery
         # Start from next level
@@ -40,12 +51,14 @@ class GameState:
             expected = self.level_sequence[i]
             
             # Check match
-            if expected.upper() in level_name.upper():
+            if expected.upper() == level_name:
                 # Found a match!
                 if i == start_search:
                     print(f"Level Changed (Valid Sequence): {self.current_level} -> {expected}", flush=True)
                 else:
                     print(f"Level Changed (SKIPPED TO): {self.current_level} -> {expected} (Skipped {i - start_search} levels)", flush=True)
+                    self.record("anomaly", anomaly="level_skipped", previous=self.current_level, level=expected, skipped=i - start_search)
+                self.record("level", previous=self.current_level, level=expected)
                 
                 self.current_level = expected
                 self.current_level_index = i
@@ -60,3 +73,4 @@ class GameState:
     def finish_run(self):
         self.state = self.FINISHED
         print("Run Finished!", flush=True)
+        self.record("finish")
@@ -0,0 +1,101 @@
+class GameTimeEstimator:
+    """
+    Clock-driven estimate of elapsed in-game time.
+
+    The HUD timer counts down in whole seconds, so one reading R only says the
+    elapsed time is somewhere in [start - R, start - R + 1). Instead of sending
+    that directly, the estimator keeps an anchor (elapsed value at a timestamp)
+    and extrapolates with the clock between readings:
+    - When two consecutive readings differ by one second, the flip happened
+      between their capture times; the midpoint pins the phase to within half
+      the interval between the two frames.
+    - Later readings only correct drift: a prediction slightly outside the
+      reading's interval is nudged back in, a large disagreement re-anchors.
+    - A reading that stays the same well past its interval means the game timer
+      is paused; the estimate is frozen until the timer moves again.
+    All timestamps must come from the same clock (the frames' capture times).
+    """
+    DRIFT_MARGIN = 0.25   # Seconds outside the reading's interval that are nudged, not re-anchored
+    PAUSE_MARGIN = 1.5    # Seconds past the interval before a still reading counts as a pause
+
+    def __init__(self, start_value):
+        self.start_value = start_value  # Timer reading at run start (e.g. 1800 for 30:00)
+        self.anchor_elapsed = None
+        self.anchor_time = None
+        self.uncertainty = float("inf")  # Half-width of the window the anchor flip happened in
+        self.paused = False
+        self.last_reading = None
+        self.last_reading_time = None
+        self.reading_since = None  # When the current reading first appeared
+
+        # Counters
+        self.flips = 0
+        self.corrections = 0
+        self.reanchors = 0
+
+    def anchor(self, elapsed, timestamp, uncertainty):
+        self.anchor_elapsed = elapsed
+        self.anchor_time = timestamp
+        self.uncertainty = uncertainty
+        self.paused = False
+
+    def elapsed(self, timestamp):
+        """Estimated elapsed game time at timestamp, None before the first reading"""
+        if self.anchor_time is None:
+            return None
+        if self.paused:
+            return self.anchor_elapsed
+        return self.anchor_elapsed + (timestamp - self.anchor_time)
+
+    def observe(self, reading, capture_time):
+        """Feed one timer reading (remaining seconds) captured at capture_time"""
+        low = self.start_value - reading  # Elapsed time at the moment the display showed R
+        high = low + 1.0
+        flipped = False
+
+        if self.anchor_time is None:
+            self.anchor(low + 0.5, capture_time, 0.5)  # No phase information yet
+        elif self.last_reading is not None and reading == self.last_reading - 1:
+            # Seconds digit flipped between the previous frame and this one
+            self.flips += 1
+            flipped = True
+            window = (capture_time - self.last_reading_time) / 2.0
+            flip_time = self.last_reading_time + window
+            if self.paused or window <= self.uncertainty or not low - self.DRIFT_MARGIN <= self.elapsed(flip_time) <= low + self.DRIFT_MARGIN:
+                self.anchor(low, flip_time, window)
+            self.reading_since = flip_time
+        else:
+            predicted = self.elapsed(capture_time)
+            if self.paused:
+                if reading != self.last_reading:
+                    # Timer moved again without a clean one-second flip
+                    self.reanchors += 1
+                    self.anchor(low + 0.5, capture_time, 0.5)
+            elif reading == self.last_reading and capture_time - self.reading_since > 1.0 + self.PAUSE_MARGIN:
+                # Same reading for well over a second: the timer is standing still.
+                # Freeze where the estimate is now so the sent game time never goes backwards
+                self.anchor(min(predicted, high), capture_time, 0.5)
+                self.paused = True
+            elif not low - self.DRIFT_MARGIN <= predicted <= high + self.DRIFT_MARGIN:
+                # Far off (missed readings, OCR glitch recovered, timer jumped): start over
+                self.reanchors += 1
+                self.anchor(low + 0.5, capture_time, 0.5)
+            elif not low <= predicted < high:
+                # Slightly off: shift the anchor so the prediction sits on the interval edge
+                self.corrections += 1
+                target = low if predicted < low else high
+                self.anchor_elapsed += target - predicted
+
+        if reading != self.last_reading and not flipped:
+            self.reading_since = capture_time  # New reading that was not a clean flip
+        self.last_reading = reading
+        self.last_reading_time = capture_time
+
+    def stats(self):
+        return {
+            "uncertainty": self.uncertainty,
+            "paused": self.paused,
+            "flips": self.flips,
+            "corrections": self.corrections,
+            "reanchors": self.reanchors,
+        }
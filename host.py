@@ -0,0 +1,298 @@
+"""
+Host mode: several analyzers (one per runner) in one process, for races and restreams.
+
+    python host.py host.json
+
+host.json lists the streams. Each stream has its own regions (inline or from
+its own config file), GameState and LiveSplit Server:
+
+    {
+      "workers": 4,
+      "cpu_budget": 1.0,
+      "streams": [
+        {"name": "runner1", "config": "runner1.json", "livesplit_port": 16834},
+        {"name": "runner2", "timer_region": {...}, "gametype_region": {...},
+         "level_region": {...}, "livesplit_host": "192.168.1.20"}
+      ]
+    }
+
+All streams submit their OCR work to one FairOcrPool, which serves the streams
+round-robin so a busy stream cannot starve the others. The CPU budget is split
+between the streams' schedulers, so adding a runner lowers every stream's
+OCR rates under load instead of adding a full analyzer's worth of threads.
+"""
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from config import load_config, region_settings, frame_ring_settings, pipe_source_settings
+from livesplit_client import LiveSplitClient
+from log_queue import LogQueue, ERROR
+
+
+class FairOcrPool:
+    """
+    Worker threads shared by several streams. Every stream has its own queue;
+    idle workers take the next job from the streams in turn (round-robin).
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 2
+        self.cond = threading.Condition()
+        self.queues = OrderedDict()  # stream -> deque of (future, fn, args)
+        self.threads = []
+        self.running = False
+
+        # Per-stream counters
+        self.completed = {}
+        self.busy = {}  # Seconds of worker time
+
+    def start(self):
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ocr-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def shutdown(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
+
+    def submit(self, stream, fn, *args):
+        future = Future()
+        with self.cond:
+            self.queues.setdefault(stream, deque()).append((future, fn, args))
+            self.cond.notify()
+        return future
+
+    def executor(self, stream):
+        """Executor-like view that submits to this pool under a stream name"""
+        return StreamExecutor(self, stream)
+
+    def _next_job(self):
+        """Oldest job of the first stream with work; that stream then goes to the back"""
+        for stream, jobs in self.queues.items():
+            if jobs:
+                self.queues.move_to_end(stream)
+                return stream, jobs.popleft()
+        return None
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                job = self._next_job()
+                while job is None and self.running:
+                    self.cond.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+            stream, (future, fn, args) = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            start = time.perf_counter()
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            elapsed = time.perf_counter() - start
+            with self.cond:
+                self.completed[stream] = self.completed.get(stream, 0) + 1
+                self.busy[stream] = self.busy.get(stream, 0.0) + elapsed
+
+    def stats(self):
+        with self.cond:
+            return {
+                stream: {
+                    "queued": len(jobs),
+                    "completed": self.completed.get(stream, 0),
+                    "busy_s": self.busy.get(stream, 0.0),
+                }
+                for stream, jobs in self.queues.items()
+            }
+
+
+class StreamExecutor:
+    """The submit() side of an executor, for AnalysisPipeline"""
+
+    def __init__(self, pool, stream):
+        self.pool = pool
+        self.stream = stream
+
+    def submit(self, fn, *args):
+        return self.pool.submit(self.stream, fn, *args)
+
+
+class AnalyzerHost:
+    """Runs one Analyzer per stream, each in its own thread, on a shared FairOcrPool"""
+
+    def __init__(self, workers=None, cpu_budget=1.0, log_queue=None):
+        self.pool = FairOcrPool(workers)
+        self.logs = log_queue or LogQueue()  # Shared by the streams, lines are prefixed with the stream name
+        self.cpu_budget = cpu_budget  # Fraction of one core, split between the streams
+        self.analyzers = OrderedDict()  # name -> Analyzer
+        self.threads = []
+
+    def add_stream(self, name, settings):
+        """settings: a config dict (regions, latency_compensation, preprocess, frame_ring, livesplit_host/port)"""
+        from analyzer import Analyzer
+        from frame_ring import FrameRing
+        from frame_source import PipeFrameSource
+        from telemetry import TelemetryStore
+
+        # Learned templates are per stream (resolution and capture differ between runners)
+        directory = os.path.join("streams", name)
+        os.makedirs(directory, exist_ok=True)
+
+        livesplit = LiveSplitClient(settings.get('livesplit_host', 'localhost'), settings.get('livesplit_port', 16834))
+        pipe = pipe_source_settings(settings)  # A runner's feed from OBS/ffmpeg instead of this screen
+        analyzer = Analyzer(
+            livesplit,
+            latency_compensation=settings.get('latency_compensation', 0.1),
+            timer_template_path=os.path.join(directory, "timer_templates.npz"),
+            countdown_template_path=os.path.join(directory, "countdown_templates.npz"),
+            banner_fingerprint_path=os.path.join(directory, "banner_fingerprints.npz"),
+            capture_backend=settings.get('capture_backend', 'auto'),
+            latency_calibration=settings.get('latency_calibration', 'off'),
+            preprocess_config=settings.get('preprocess'),
+            route=settings.get('route'),
+            ocr_executor=self.pool.executor(name),
+            frame_source=PipeFrameSource(**pipe) if pipe else None,
+            log_queue=self.logs,
+            name=name,
+            **region_settings(settings)
+        )
+        ring = frame_ring_settings(settings)
+        if ring:
+            analyzer.frame_ring = FrameRing(**ring)
+        if settings.get('telemetry'):
+            analyzer.set_telemetry(TelemetryStore(settings['telemetry']))
+        self.analyzers[name] = analyzer
+        return analyzer
+
+    def _run_stream(self, analyzer):
+        try:
+            analyzer.livesplit.connect()
+            analyzer.process_loop()
+        except Exception as e:
+            analyzer.log(f"FATAL ERROR in stream: {e}", level=ERROR)
+            traceback.print_exc()
+        finally:
+            analyzer.livesplit.close()
+            if analyzer.telemetry:
+                analyzer.telemetry.close()
+
+    def start(self):
+        share = self.cpu_budget / max(1, len(self.analyzers))
+        self.pool.start()
+        for name, analyzer in self.analyzers.items():
+            analyzer.scheduler.cpu_budget = share
+            thread = threading.Thread(target=self._run_stream, args=(analyzer,), name=f"stream-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        for analyzer in self.analyzers.values():
+            analyzer.stop()
+
+    def alive(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.pool.shutdown()
+
+    def stats(self):
+        """Per-stream metrics snapshot plus the stream's share of the pool"""
+        pool = self.pool.stats()
+        return {
+            name: {
+                "metrics": analyzer.metrics.snapshot(),
+                "scheduler": analyzer.scheduler.stats(),
+                "livesplit": analyzer.livesplit.stats(),
+                "pool": pool.get(name, {}),
+                "source": analyzer.frame_source.stats() if hasattr(analyzer.frame_source, "stats") else {},
+            }
+            for name, analyzer in self.analyzers.items()
+        }
+
+    def format_report(self):
+        lines = []
+        for name, stats in self.stats().items():
+            metrics, pool = stats["metrics"], stats["pool"]
+            lines.append(
+                f"{name:<12} FPS {metrics['fps']:5.1f}  OCR/s {metrics['ocr_per_s']:5.1f}  "
+                f"backoff {stats['scheduler']['backoff']:.2f}  queued {pool.get('queued', 0)}  "
+                f"OCR busy {pool.get('busy_s', 0.0):.1f}s"
+            )
+        return "\n".join(lines)
+
+
+def load_host_config(path):
+    """Host config with every stream's settings resolved (its own config file + inline overrides)"""
+    with open(path, 'r') as f:
+        host_config = json.load(f)
+    streams = []
+    for i, stream in enumerate(host_config.get('streams', [])):
+        settings = load_config(stream['config']) if stream.get('config') else {}
+        settings.update({key: value for key, value in stream.items() if key != 'config'})
+        settings.setdefault('name', f"stream{i + 1}")
+        streams.append(settings)
+    host_config['streams'] = streams
+    return host_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several analyzers (one per runner) in one process")
+    parser.add_argument("config", nargs="?", default="host.json", help="Host config listing the streams")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between per-stream metric reports")
+    parser.add_argument("--metrics-out", default=None, help="Write per-stream metrics JSON here on exit")
+    args = parser.parse_args()
+
+    host_config = load_host_config(args.config)
+    if not host_config['streams']:
+        print(f"No streams in {args.config}", flush=True)
+        return 1
+
+    logs = LogQueue(host_config.get('log_level', 'info'))
+    if host_config.get('log_file'):
+        logs.add_file(host_config['log_file'])
+    host = AnalyzerHost(host_config.get('workers'), host_config.get('cpu_budget', 1.0), logs)
+    for settings in host_config['streams']:
+        host.add_stream(settings['name'], settings)
+
+    def stop(signum, frame):
+        host.stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    host.start()
+    last_report = time.time()
+    while host.alive():
+        time.sleep(0.5)
+        if time.time() - last_report >= args.report_interval:
+            logs.info("Streams:\n%s", host.format_report())
+            last_report = time.time()
+    host.join()
+    logs.close()
+
+    if args.metrics_out:
+        with open(args.metrics_out, 'w') as f:
+            json.dump(host.stats(), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
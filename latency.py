@@ -0,0 +1,155 @@
+"""
+Measuring the delay between the analyzer and LiveSplit, to set latency_compensation.
+
+The analyzer extrapolates game time from the frame's capture time to the moment
+it sends setgametime (gametime.py), so capture, OCR and state logic are already
+accounted for; their timings are the "frame" stage of the loop metrics. What is
+left is the time until LiveSplit applies the value: the sender queue, the socket
+and LiveSplit itself. That is what latency_compensation adds.
+
+During a run a getgametime query is sent behind the setgametime commands.
+LiveSplit's game time keeps running after it was set, so its reply G, taken at
+the middle of the round trip, compared with the analyzer's estimate E for that
+instant (without compensation) gives the delay directly:
+
+    delay = compensation in effect - (G - E)
+
+Outside a run, getcurrenttime round trips give half the round-trip time, a
+lower bound (no queue wait) reported for comparison. Modes:
+- "calibrate": collect SAMPLES in-run delays, set the compensation to their median, stop
+- "auto": keep measuring and move the compensation towards the recent median
+  (half round trips until the first run gives enough delays)
+"""
+import statistics
+import threading
+from collections import deque
+
+MODES = ("off", "calibrate", "auto")
+
+
+def parse_livesplit_time(text):
+    """Seconds from a LiveSplit Server time ("1:02:03.45", "-0:05.00"), None for "-" or garbage"""
+    text = (text or "").strip()
+    negative = text.startswith("-")
+    try:
+        seconds = 0.0
+        for part in text.lstrip("-").split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return -seconds if negative else seconds
+
+
+class LatencyCalibrator:
+    """Background measurement of the analyzer -> LiveSplit delay for one Analyzer"""
+    INTERVAL = 2.0        # Seconds between queries
+    SAMPLES = 15          # Measurements before "calibrate" sets the compensation
+    WINDOW = 60           # Recent measurements the "auto" median is taken over
+    MAX_STEP = 0.02       # Largest change of the compensation per "auto" adjustment (seconds)
+    MAX_DELAY = 2.0       # Measurements outside [-MAX_DELAY, MAX_DELAY] are discarded
+
+    def __init__(self, analyzer, mode="auto"):
+        self.analyzer = analyzer
+        self.set_mode(mode)
+        self.delays = deque(maxlen=self.WINDOW)       # From getgametime during runs
+        self.round_trips = deque(maxlen=self.WINDOW)  # Half round trips of getcurrenttime
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.adjustments = 0
+        self.failed_queries = 0
+
+    def set_mode(self, mode):
+        if mode not in MODES:
+            raise ValueError(f"Unknown latency calibration mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.mode = mode
+
+    def start(self):
+        if self.mode == "off" or (self.thread and self.thread.is_alive()):
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="latency", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=3)
+            self.thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.INTERVAL):
+            try:
+                self.measure()
+            except Exception as e:
+                self.analyzer.log(f"Latency measurement failed: {e}")
+            if self.mode == "off":
+                return
+
+    def measure(self):
+        analyzer = self.analyzer
+        gametime = analyzer.gametime
+        in_run = gametime is not None and analyzer.route.current.phase == "running"
+        compensation = analyzer.latency_compensation
+        query = analyzer.livesplit.query("getgametime" if in_run else "getcurrenttime")
+        if query is None:
+            self.failed_queries += 1
+            return
+        round_trip = query.received - query.sent
+        analyzer.metrics.record("livesplit_rtt", round_trip)
+
+        if in_run:
+            value = parse_livesplit_time(query.reply)
+            estimate = gametime.elapsed(query.sent + round_trip / 2)
+            if value is None or estimate is None:
+                return
+            delay = compensation - (value - estimate)
+            if abs(delay) > self.MAX_DELAY:
+                return  # LiveSplit paused, reset or game time re-anchored in between
+            self.delays.append(delay)
+            analyzer.metrics.record("livesplit_delay", max(delay, 0.0))
+        else:
+            self.round_trips.append(round_trip / 2)
+        self.update()
+
+    def samples(self):
+        """Measurements to calibrate from: in-run delays, or half round trips in "auto" mode until there are enough"""
+        if len(self.delays) >= self.SAMPLES or self.mode == "calibrate":
+            return list(self.delays)
+        return list(self.round_trips)
+
+    def update(self):
+        samples = self.samples()
+        if len(samples) < self.SAMPLES:
+            return
+        target = max(0.0, statistics.median(samples))
+        current = self.analyzer.latency_compensation
+        if self.mode == "calibrate":
+            self.set_compensation(target)
+            self.analyzer.log(f"Latency calibrated: {target * 1000:.0f} ms ({self.format_stats()})")
+            self.mode = "off"
+        elif abs(target - current) > 0.005:
+            step = max(-self.MAX_STEP, min(self.MAX_STEP, target - current))
+            self.set_compensation(current + step)
+
+    def set_compensation(self, value):
+        self.analyzer.latency_compensation = round(value, 3)
+        self.adjustments += 1
+
+    def format_stats(self):
+        parts = []
+        for label, values in (("in-run delay", self.delays), ("half round trip", self.round_trips)):
+            if values:
+                ordered = sorted(values)
+                parts.append(f"{label} p50 {statistics.median(ordered) * 1000:.0f} ms, "
+                             f"p90 {ordered[int(0.9 * (len(ordered) - 1))] * 1000:.0f} ms, n={len(ordered)}")
+        return "; ".join(parts) or "no samples"
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "compensation": self.analyzer.latency_compensation,
+            "delays": len(self.delays),
+            "round_trips": len(self.round_trips),
+            "adjustments": self.adjustments,
+            "failed_queries": self.failed_queries,
+        }
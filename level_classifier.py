@@ -0,0 +1,149 @@
+import os
+import re
+import cv2
+import numpy as np
+
+# Bits set in each byte value, for Hamming distances between packed fingerprints
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two short strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def max_edits(length):
+    """Edits a label of this length may differ by: none up to 5 letters, then one per 5 letters"""
+    return max(0, (length - 1) // 5)
+
+
+def fuzzy_match(text, vocabulary):
+    """
+    Closest vocabulary entry to an OCR text, or None.
+    Each label is compared with every same-length window of the text so noise
+    around the banner ("| Isolation .") does not count against it. Short labels
+    must match exactly (max_edits) and texts shorter than the label minus its
+    edits are rejected, so partial reads ("Hang") and look-alike words ("Store")
+    are not taken for a label.
+    Returns (label, ratio) where ratio is edits / label length (0.0 = exact).
+    """
+    clean = re.sub(r"[^A-Z ]", "", text.upper()).strip()
+    if not clean:
+        return None, 1.0
+
+    best, best_ratio = None, 1.0
+    for label in vocabulary:
+        target = label.upper()
+        n = len(target)
+        if target in clean:
+            return label, 0.0
+        allowed = max_edits(n)
+        if not allowed or len(clean) < n - allowed:
+            continue
+        windows = [clean[i:i + n] for i in range(max(1, len(clean) - n + 1))]
+        edits = min(edit_distance(w, target) for w in windows)
+        if edits <= allowed and edits / float(n) < best_ratio:
+            best, best_ratio = label, edits / float(n)
+    return best, best_ratio
+
+
+class BannerClassifier:
+    """
+    Closed-vocabulary classifier for the level banner.
+    The thresholded banner is cropped to its text and reduced to a 64x16 bit
+    fingerprint; fingerprints captured on earlier frames are matched by Hamming
+    distance. Unknown bitmaps fall back to OCR + fuzzy_match against the
+    vocabulary; only an exact OCR match teaches a new fingerprint, so a fuzzy
+    read is never stored as the label's bitmap.
+    """
+    FINGERPRINT_SIZE = (64, 16)
+    MAX_PER_LABEL = 24  # Fingerprints kept per label (variations in animation/background)
+
+    def __init__(self, vocabulary, path="banner_fingerprints.npz", max_distance=0.12, autosave=True):
+        self.vocabulary = list(vocabulary)
+        self.path = path
+        self.autosave = autosave  # Save as soon as a new label is learned
+        self.max_distance = max_distance  # Fraction of differing bits for a fingerprint match
+        n_bytes = self.FINGERPRINT_SIZE[0] * self.FINGERPRINT_SIZE[1] // 8
+        self.fingerprints = np.zeros((0, n_bytes), dtype=np.uint8)
+        self.labels = []
+
+        # Counters
+        self.fingerprint_hits = 0
+        self.ocr_fallbacks = 0
+        self.load()
+
+    def fingerprint(self, thresh):
+        """Packed bit fingerprint of the text in a thresholded bitmap, None when it is blank"""
+        x, y, w, h = cv2.boundingRect(thresh)
+        if not w or not h:
+            return None
+        small = cv2.resize(thresh[y:y + h, x:x + w], self.FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+        return np.packbits(small > 127)
+
+    def match(self, fingerprint):
+        """Returns (label, distance) of the nearest stored fingerprint"""
+        if not self.labels:
+            return None, 1.0
+        distances = POPCOUNT[self.fingerprints ^ fingerprint].sum(axis=1) / float(self.fingerprints.shape[1] * 8)
+        i = int(distances.argmin())
+        return self.labels[i], float(distances[i])
+
+    def classify(self, thresh, ocr):
+        """
+        Canonical vocabulary label for the banner, or "" when there is none.
+        ocr(thresh) is only called when no stored fingerprint is close enough.
+        """
+        fingerprint = self.fingerprint(thresh)
+        if fingerprint is None:
+            return ""
+
+        label, distance = self.match(fingerprint)
+        if distance <= self.max_distance:
+            self.fingerprint_hits += 1
+            return label
+
+        self.ocr_fallbacks += 1
+        label, ratio = fuzzy_match(ocr(thresh), self.vocabulary)
+        if label is None:
+            return ""
+        if ratio == 0.0:
+            self.learn(fingerprint, label)
+        return label
+
+    def learn(self, fingerprint, label):
+        is_new = label not in self.labels
+        if self.labels.count(label) >= self.MAX_PER_LABEL:
+            # Replace the oldest fingerprint of this label
+            i = self.labels.index(label)
+            del self.labels[i]
+            self.fingerprints = np.delete(self.fingerprints, i, axis=0)
+        self.labels.append(label)
+        self.fingerprints = np.vstack([self.fingerprints, fingerprint[np.newaxis]])
+        if is_new and self.autosave:
+            self.save()
+
+    def save(self):
+        if not self.labels:
+            return
+        try:
+            np.savez(self.path, labels=np.array(self.labels), fingerprints=self.fingerprints)
+        except OSError as e:
+            print(f"Failed to save banner fingerprints: {e}", flush=True)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        data = np.load(self.path)
+        labels = [str(label) for label in data["labels"]]
+        keep = [i for i, label in enumerate(labels) if label in self.vocabulary]  # Drop labels no longer in use
+        self.labels = [labels[i] for i in keep]
+        self.fingerprints = data["fingerprints"][keep]
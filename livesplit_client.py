@@ -1,31 +1,212 @@
 import socket
+import threading
 import time
+from collections import deque
+
+
+class Query:
+    """A get* command whose reply line is read back by the sender thread"""
+
+    def __init__(self, command):
+        self.command = command
+        self.done = threading.Event()
+        self.reply = None
+        self.sent = None  # time.monotonic() when sent / when the reply arrived (the clock of capture times)
+        self.received = None
+
 
 class LiveSplitClient:
+    """
+    Client for the LiveSplit Server TCP protocol.
+    Commands are queued and sent by a dedicated thread, so a stalled LiveSplit
+    never blocks the analysis loop:
+    - setgametime is latest-wins: a new value replaces a still-queued one
+    - starttimer/split/reset/... are delivered in order and never dropped
+    - the connection is re-established with exponential backoff after errors
+    - query() sends a get* command in the same order and waits for its reply
+    """
+    MAX_QUEUE = 64
+    RECONNECT_MIN_DELAY = 0.5
+    RECONNECT_MAX_DELAY = 10.0
+
     def __init__(self, host='localhost', port=16834):
         self.host = host
         self.port = port
         self.socket = None
+        self.reply_buffer = b""
+        self.metrics = None  # LoopMetrics of the analyzer, records "send" timings
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.sender_thread = None
+        self.running = False
+
+        # Counters
+        self.sent = 0
+        self.coalesced = 0
+        self.send_errors = 0
+        self.reconnects = 0
+
+    def _open_socket(self):
+        sock = socket.create_connection((self.host, self.port), timeout=2)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Don't let Nagle delay tiny commands
+        return sock
+
+    def _close_socket(self):
+        if self.socket:
+            try:
+                self.socket.close()
+            except OSError:
+                pass
+            self.socket = None
+        self.reply_buffer = b""
 
     def connect(self):
+        self._close_socket()
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
+            self.socket = self._open_socket()
             print(f"Connected to LiveSplit Server at {self.host}:{self.port}", flush=True)
-            return True
+            connected = True
         except Exception as e:
             print(f"Failed to connect to LiveSplit: {e}", flush=True)
             self.socket = None
-            return False
+            connected = False
+
+        # The sender keeps retrying in the background even if this attempt failed
+        if not self.sender_thread or not self.sender_thread.is_alive():
+            self.running = True
+            self.sender_thread = threading.Thread(target=self._sender_loop, name="livesplit-sender", daemon=True)
+            self.sender_thread.start()
+        return connected
+
+    @property
+    def connected(self):
+        return self.socket is not None
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.sender_thread:
+            self.sender_thread.join(timeout=2)
+        self._close_socket()
 
     def send_command(self, command):
-        if not self.socket:
-            return
-        try:
-            self.socket.sendall((command + '\r\n').encode('utf-8'))
-        except Exception as e:
-            print(f"Error sending command '{command}': {e}", flush=True)
-            self.socket = None  # Force reconnect on next attempt
+        """Queue a command for the sender thread. Never blocks."""
+        if not self.running:
+            return  # Not connected yet
+        with self.cond:
+            if command.startswith("setgametime ") and self.queue and self._is_gametime(self.queue[-1]):
+                self.queue[-1] = command  # Latest game time wins
+                self.coalesced += 1
+            else:
+                self.queue.append(command)
+                if len(self.queue) > self.MAX_QUEUE:
+                    self._drop_stale_gametimes()
+            self.cond.notify()
+
+    @staticmethod
+    def _is_gametime(command):
+        return not isinstance(command, Query) and command.startswith("setgametime ")
+
+    def query(self, command, timeout=2.0):
+        """
+        Send a get* command (e.g. getgametime) behind the queued commands and wait
+        for the reply. Returns the Query (reply, sent, received), None when not
+        connected, on errors or after timeout.
+        """
+        if not self.running or not self.socket:
+            return None
+        query = Query(command)
+        with self.cond:
+            self.queue.append(query)
+            self.cond.notify()
+        if not query.done.wait(timeout) or query.reply is None:
+            return None
+        return query
+
+    def _read_reply(self):
+        """One reply line from the server (the socket timeout applies)"""
+        while b"\n" not in self.reply_buffer:
+            chunk = self.socket.recv(256)
+            if not chunk:
+                raise ConnectionError("LiveSplit closed the connection")
+            self.reply_buffer += chunk
+        line, self.reply_buffer = self.reply_buffer.split(b"\n", 1)
+        return line.decode('utf-8', 'replace').strip()
+
+    def _drop_stale_gametimes(self):
+        """Keep the queue bounded: game times older than the newest one are useless"""
+        newest = None
+        for command in reversed(self.queue):
+            if self._is_gametime(command):
+                newest = command
+                break
+        kept = deque(c for c in self.queue if not self._is_gametime(c) or c is newest)
+        self.coalesced += len(self.queue) - len(kept)
+        self.queue = kept
+
+    def _sender_loop(self):
+        delay = self.RECONNECT_MIN_DELAY
+        while True:
+            with self.cond:
+                while self.running and not self.queue:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                command = self.queue[0]
+
+            if not self.socket:
+                try:
+                    self.socket = self._open_socket()
+                    self.reconnects += 1
+                    delay = self.RECONNECT_MIN_DELAY
+                    print(f"Reconnected to LiveSplit Server at {self.host}:{self.port}", flush=True)
+                except OSError:
+                    with self.cond:
+                        self.cond.wait(timeout=delay)  # Woken early by close()
+                    delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+                    continue
+
+            query = command if isinstance(command, Query) else None
+            try:
+                start = time.perf_counter()
+                if query:
+                    query.sent = time.monotonic()
+                    self.socket.sendall((query.command + '\r\n').encode('utf-8'))
+                    query.reply = self._read_reply()
+                    query.received = time.monotonic()
+                else:
+                    self.socket.sendall((command + '\r\n').encode('utf-8'))
+                if self.metrics:
+                    self.metrics.record("query" if query else "send", time.perf_counter() - start)
+                with self.cond:
+                    # Only remove it now: a failed command stays at the head and is retried
+                    if self.queue and self.queue[0] is command:
+                        self.queue.popleft()
+                self.sent += 1
+                if query:
+                    query.done.set()
+            except Exception as e:
+                print(f"Error sending command '{query.command if query else command}': {e}", flush=True)
+                self.send_errors += 1
+                self._close_socket()  # Force reconnect on next attempt
+                if query:
+                    # Not retried: the caller measures timings, a late reply is useless
+                    with self.cond:
+                        if self.queue and self.queue[0] is query:
+                            self.queue.popleft()
+                    query.done.set()
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "queue_depth": len(self.queue),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "send_errors": self.send_errors,
+            "reconnects": self.reconnects,
+        }
 
     def start(self):
         print("[LiveSplit] Starting timer", flush=True)
@@ -48,3 +229,37 @@ class LiveSplitClient:
         # LiveSplit expects time in seconds (float)
         # Only log occasionally to avoid spam
         self.send_command(f"setgametime {seconds}")
+
+
+class RecordingLiveSplitClient(LiveSplitClient):
+    """
+    Stand-in for LiveSplitClient used when analyzing recordings.
+    Nothing is sent over the network; timer commands are recorded with the media
+    time they happened at (current_time, set by the driver before each frame) and
+    the game time LiveSplit would have shown.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.current_time = 0.0
+        self.gametime = None
+        self.events = []
+
+    def connect(self):
+        return True
+
+    def query(self, command, timeout=2.0):
+        return None  # No server to answer
+
+    def send_command(self, command):
+        if command.startswith("setgametime "):
+            # Sent every frame, only the latest value is kept
+            self.gametime = float(command.split(" ", 1)[1])
+            return
+        self.events.append({"time": round(self.current_time, 3), "command": command, "gametime": self.gametime})
+
+    def save(self, path):
+        import json
+        with open(path, 'w') as f:
+            for event in self.events:
+                f.write(json.dumps(event) + "\n")
@@ -0,0 +1,153 @@
+"""
+Leveled, bounded logging for the analyzer.
+
+log() only appends a (time, level, message, args) tuple to one bounded deque
+per consumer; deque.append is atomic, so producers never take a lock or wait
+for a consumer. Formatting (timestamp, % args) happens on the consumer side:
+the GUI drains its deque in batches on a timer, and StreamSink threads write
+the console / log file in batches. When a consumer falls behind, its oldest
+records are dropped instead of growing without bound.
+
+Messages below the queue level return before anything is built; pass format
+args instead of an f-string, or check enabled() around expensive messages:
+
+    logs.debug("Timer: %r (%s)", text, seconds)
+"""
+import atexit
+import sys
+import threading
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+def parse_level(level):
+    """Level number from a name ("debug", "INFO") or a number"""
+    if isinstance(level, str):
+        return {name.lower(): value for value, name in LEVEL_NAMES.items()}[level.lower()]
+    return level
+
+
+def format_record(record):
+    timestamp, level, message, args = record
+    if args:
+        message = message % args
+    clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+    prefix = "" if level == INFO else f"{LEVEL_NAMES.get(level, level)}: "
+    return f"[{clock}.{int(timestamp % 1 * 1000):03d}] {prefix}{message}"
+
+
+class LogQueue:
+    """Fan-out of log records to bounded per-consumer deques"""
+
+    def __init__(self, level=INFO, console=True):
+        self.level = parse_level(level)
+        self.consumers = []  # Bounded deques, one per consumer
+        self.sinks = []
+        self.dropped = 0  # Approximate: records pushed out of a full consumer deque
+        if console:
+            self.add_sink(StreamSink(sys.stdout))
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def subscribe(self, maxlen=1000):
+        """New consumer deque receiving every record from now on"""
+        records = deque(maxlen=maxlen)
+        self.consumers = self.consumers + [records]  # Replace, so log() can iterate without a lock
+        return records
+
+    def add_sink(self, sink):
+        sink.start(self.subscribe(sink.maxlen))
+        self.sinks.append(sink)
+        return sink
+
+    def add_file(self, path):
+        """Append formatted records to a file from a background thread"""
+        return self.add_sink(StreamSink(open(path, 'a', encoding='utf-8'), owns_stream=True))
+
+    def log(self, level, message, *args):
+        if level < self.level:
+            return
+        record = (time.time(), level, message, args)
+        for records in self.consumers:
+            if len(records) == records.maxlen:
+                self.dropped += 1
+            records.append(record)
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        self.log(WARNING, message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, message, *args)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+
+
+def drain(records, limit=None):
+    """Pop up to limit records (all when None) from a consumer deque"""
+    batch = []
+    while records and (limit is None or len(batch) < limit):
+        try:
+            batch.append(records.popleft())
+        except IndexError:
+            break
+    return batch
+
+
+class StreamSink:
+    """Background writer of formatted records to a stream (console or file)"""
+    INTERVAL = 0.2  # Seconds between batches
+
+    def __init__(self, stream, maxlen=10000, owns_stream=False):
+        self.stream = stream
+        self.maxlen = maxlen
+        self.owns_stream = owns_stream
+        self.records = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, records):
+        self.records = records
+        self.thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)  # Write what is still queued when the process exits
+
+    def _write(self):
+        batch = drain(self.records)
+        if not batch:
+            return
+        try:
+            self.stream.write("".join(format_record(record) + "\n" for record in batch))
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def _run(self):
+        while not self.stop_event.wait(self.INTERVAL):
+            self._write()
+
+    def close(self):
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+        self._write()
+        if self.owns_stream:
+            self.stream.close()
@@ -1,12 +1,14 @@
 import tkinter as tk
 from tkinter import ttk
 import threading
-import cv2
-import mss
-import numpy as np
-from PIL import Image, ImageTk
 from analyzer import Analyzer
 from livesplit_client import LiveSplitClient
+from frame_ring import FrameRing
+from frame_source import PipeFrameSource
+from config import REGION_NAMES, frame_ring_settings, pipe_source_settings, update_config
+from calibration import TEMPLATE_FILE, grab_screen, learn_templates, load_templates, calibrate
+from telemetry import TelemetryStore
+from log_queue import LogQueue, drain, format_record, parse_level
 import sys
 
 # Force unbuffered output
@@ -14,24 +16,37 @@ sys.stdout.reconfigure(line_buffering=True)
 sys.stderr.reconfigure(line_buffering=True)
 
 class App:
+    LOG_LINES = 500        # Lines kept in the log view
+    LOG_INTERVAL = 100     # ms between log view updates
+    LOG_BATCH = 200        # Records inserted per update
+
     def __init__(self, root):
         self.root = root
         self.root.title("EVA Zombie Split Analyzer")
-        self.root.geometry("400x520")
+        self.root.geometry("400x710")
         self.root.attributes("-topmost", True)
 
+        # Log records from every thread, drained into the log view by drain_logs()
+        self.logs = LogQueue()
+        self.log_records = self.logs.subscribe(maxlen=self.LOG_LINES)
+
         self.livesplit = LiveSplitClient()
-        self.analyzer = Analyzer(self.livesplit, log_callback=self.log_async)
+        self.analyzer = Analyzer(self.livesplit, log_queue=self.logs)
         self.analysis_thread = None
+        self.latency_adjustments = 0  # Calibration adjustments already shown in the spinbox
         
         # Four separate regions
         self.timer_region = None
         self.gametype_region = None
         self.level_region = None
         self.countdown_region = None
+        self.loading_config = False  # set_region() must not write config.json back while it is being read
 
         self.create_widgets()
         self.load_config()
+        self.refresh_metrics()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.drain_logs()
         
         # Auto-connect to LiveSplit on launch
         self.connect_livesplit()
@@ -75,6 +90,12 @@ class App:
         btn_select_countdown = ttk.Button(region_frame, text="Select Countdown Region", command=lambda: self.select_region("countdown"))
         btn_select_countdown.pack(pady=2)
 
+        # Automatic calibration from learned HUD templates (calibration.py)
+        calib_frame = ttk.Frame(region_frame)
+        calib_frame.pack(pady=2)
+        ttk.Button(calib_frame, text="Learn HUD", command=self.learn_hud).pack(side="left", padx=2)
+        ttk.Button(calib_frame, text="Auto-Calibrate", command=self.auto_calibrate).pack(side="left", padx=2)
+
         # Controls
         control_frame = ttk.LabelFrame(self.root, text="Controls")
         control_frame.pack(fill="x", padx=5, pady=5)
@@ -88,25 +109,70 @@ class App:
         self.spin_latency.pack(side="left", padx=5)
         self.spin_latency.bind("<FocusOut>", self.update_latency)
         self.spin_latency.bind("<Return>", self.update_latency)
+        # Measured compensation (latency.py): once with Calibrate, or kept adjusted with Auto
+        ttk.Button(comp_frame, text="Calibrate", command=self.calibrate_latency).pack(side="left", padx=2)
+        self.var_latency_auto = tk.BooleanVar(value=False)
+        ttk.Checkbutton(comp_frame, text="Auto", variable=self.var_latency_auto, command=self.toggle_latency_auto).pack(side="left", padx=2)
 
         self.btn_start = ttk.Button(control_frame, text="Start Analysis", command=self.toggle_analysis, state="disabled")
         self.btn_start.pack(fill="x", padx=5, pady=5)
 
+        # Live loop metrics
+        metrics_frame = ttk.LabelFrame(self.root, text="Loop Metrics")
+        metrics_frame.pack(fill="x", padx=5, pady=5)
+        self.lbl_metrics = ttk.Label(metrics_frame, text="Not running", font=("Courier", 8), justify="left")
+        self.lbl_metrics.pack(fill="x", padx=5, pady=2)
+        btn_dump_metrics = ttk.Button(metrics_frame, text="Dump Metrics", command=self.dump_metrics)
+        btn_dump_metrics.pack(pady=2)
+
         # Preview (Optional, maybe just a text log)
         self.log_text = tk.Text(self.root, height=5, state="disabled")
         self.log_text.pack(fill="both", expand=True, padx=5, pady=5)
 
     def log(self, message):
-        self.log_text.config(state="normal")
-        self.log_text.insert("end", message + "\n")
-        self.log_text.see("end")
-        self.log_text.config(state="disabled")
-        # Force immediate update
-        self.log_text.update_idletasks()
-    
-    def log_async(self, message):
-        """Thread-safe logging - schedules update on main thread"""
-        self.root.after(0, lambda: self.log(message))
+        """Thread-safe: queued, shown by the next drain_logs()"""
+        self.logs.info(message)
+
+    def drain_logs(self):
+        """Move queued log records into the log view in one batch, keeping the last LOG_LINES lines"""
+        batch = drain(self.log_records, self.LOG_BATCH)
+        if batch:
+            self.log_text.config(state="normal")
+            self.log_text.insert("end", "".join(format_record(record) + "\n" for record in batch))
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - self.LOG_LINES
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_text.see("end")
+            self.log_text.config(state="disabled")
+        self.root.after(self.LOG_INTERVAL, self.drain_logs)
+
+    def refresh_metrics(self):
+        """Update the metrics panel once per second"""
+        if self.analysis_thread and self.analysis_thread.is_alive():
+            ls = self.livesplit.stats()
+            sender = f"LiveSplit queue {ls['queue_depth']}  errors {ls['send_errors']}  reconnects {ls['reconnects']}"
+            source = self.analyzer.frame_source
+            if isinstance(source, PipeFrameSource):
+                pipe = source.stats()
+                sender += f"\nPipe dropped {pipe['dropped']}/{pipe['read']}  backlog {pipe['backlog_frames'] or 0:.1f}  age {pipe['last_age_ms']:.0f} ms"
+            self.lbl_metrics.config(text=self.analyzer.metrics.format_panel() + "\n" + sender)
+        # Show compensation values set by the latency calibration. "auto" adjusts every
+        # few seconds, its value is saved when the analysis stops and on exit
+        if self.analyzer.latency.adjustments != self.latency_adjustments:
+            self.latency_adjustments = self.analyzer.latency.adjustments
+            self.var_latency.set(self.analyzer.latency_compensation)
+            if self.analyzer.latency.mode != "auto":
+                self.save_config()
+        self.root.after(1000, self.refresh_metrics)
+
+    def dump_metrics(self):
+        import datetime
+        path = f"metrics_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            self.analyzer.metrics.dump(path)
+            self.log(f"Metrics written to {path}")
+        except Exception as e:
+            self.log(f"Failed to dump metrics: {e}")
 
     def connect_livesplit(self):
         if self.livesplit.connect():
@@ -161,6 +227,7 @@ class App:
         
         config_file = "config.json"
         if os.path.exists(config_file):
+            self.loading_config = True
             try:
                 with open(config_file, 'r') as f:
                     config = json.load(f)
@@ -178,29 +245,122 @@ class App:
                 # Load latency compensation
                 if 'latency_compensation' in config:
                     self.var_latency.set(config['latency_compensation'])
+                    self.analyzer.latency_compensation = config['latency_compensation']
+                if config.get('latency_calibration') == 'auto':
+                    self.var_latency_auto.set(True)
+                    self.analyzer.set_latency_calibration('auto')
+
+                # Screen capture: "auto" (MIT-SHM on Linux/X11, else mss), "xshm" or "mss"
+                if 'capture_backend' in config:
+                    self.analyzer.frame_source.backend = config['capture_backend']
+
+                # Category route (route.py): inline definition or path to a JSON file
+                if 'route' in config:
+                    self.analyzer.set_route(config['route'])
+
+                # Per-region preprocessing overrides (scale, threshold, interpolation...)
+                if 'preprocess' in config:
+                    self.analyzer.set_preprocess_config(config['preprocess'])
+
+                # Ring buffer of recent region frames: "frame_ring.bin" or {"path": ..., "minutes": ...}
+                ring = frame_ring_settings(config)
+                if ring:
+                    self.analyzer.frame_ring = FrameRing(**ring)
+                    self.log(f"Recording region frames to {self.analyzer.frame_ring.path}")
+
+                # Frames from an OBS/ffmpeg raw video pipe instead of this screen (regions in video pixels)
+                pipe = pipe_source_settings(config)
+                if pipe:
+                    self.analyzer.frame_source = PipeFrameSource(**pipe)
+                    self.log(f"Reading {pipe['width']}x{pipe['height']} frames from {pipe['path']}")
+
+                # Log level ("debug" shows the OCR readings) and optional log file
+                if 'log_level' in config:
+                    self.logs.level = parse_level(config['log_level'])
+                if config.get('log_file'):
+                    self.logs.add_file(config['log_file'])
+
+                # Run history (splits, levels, anomalies) in this directory
+                if config.get('telemetry'):
+                    self.analyzer.set_telemetry(TelemetryStore(config['telemetry']))
                 
                 self.log("Configuration loaded.")
             except Exception as e:
                 self.log(f"Failed to load config: {e}")
+            finally:
+                self.loading_config = False
     
     def save_config(self):
-        """Save regions to config file"""
-        import json
-        
-        config = {
-            'timer_region': self.timer_region,
-            'gametype_region': self.gametype_region,
-            'level_region': self.level_region,
-            'countdown_region': self.countdown_region,
-            'latency_compensation': self.var_latency.get()
-        }
-        
+        """Save regions to config file (settings the GUI doesn't edit, e.g. "preprocess", are kept)"""
+        if self.loading_config:
+            return
         try:
-            with open("config.json", 'w') as f:
-                json.dump(config, f, indent=2)
+            update_config({
+                'timer_region': self.timer_region,
+                'gametype_region': self.gametype_region,
+                'level_region': self.level_region,
+                'countdown_region': self.countdown_region,
+                'latency_compensation': self.var_latency.get(),
+                'latency_calibration': 'auto' if self.var_latency_auto.get() else 'off'
+            })
         except Exception as e:
             self.log(f"Failed to save config: {e}")
 
+    def grab_without_window(self, callback):
+        """Hide the window, grab the screen, show the window again and call callback(screen, offset)"""
+        self.root.withdraw()
+
+        def grab():
+            try:
+                screen, left, top = grab_screen()
+            except Exception as e:
+                self.log(f"Screen grab failed: {e}")
+                return
+            finally:
+                self.root.deiconify()
+            callback(screen, (left, top))
+
+        self.root.after(300, grab)  # Give the window time to disappear
+
+    def learn_hud(self):
+        """Store templates of the selected regions for later auto-calibration"""
+        if not (self.timer_region and self.gametype_region and self.level_region):
+            self.log("Select the Timer, Game Type and Level regions before learning the HUD")
+            return
+        regions = {f"{name}_region": getattr(self, f"{name}_region") for name in REGION_NAMES}
+
+        def learn(screen, offset):
+            names = learn_templates(screen, offset, regions)
+            self.log(f"HUD templates learned for {', '.join(names)}")
+
+        self.grab_without_window(learn)
+
+    def auto_calibrate(self):
+        """Find the regions on screen from the learned HUD templates"""
+        import os
+        if not os.path.exists(TEMPLATE_FILE):
+            self.log("No HUD templates yet: select the regions once, then press 'Learn HUD'")
+            return
+
+        def search(screen, offset):
+            try:
+                regions, report = calibrate(screen, offset, load_templates())
+            except Exception as e:
+                self.log(f"Auto-calibration failed: {e}")
+                return
+            self.root.after(0, lambda: self.apply_calibration(regions, report))
+
+        # The search runs off the UI thread
+        self.grab_without_window(lambda screen, offset: threading.Thread(target=search, args=(screen, offset), daemon=True).start())
+
+    def apply_calibration(self, regions, report):
+        for name in REGION_NAMES:
+            region = regions.get(f"{name}_region")
+            if region:
+                self.set_region(name, region)
+        summary = ", ".join(f"{name} ({entry['method']})" for name, entry in report.items())
+        self.log(f"Auto-calibrated: {summary}")
+
     def update_latency(self, event=None):
         """Update analyzer latency when input changes"""
         val = self.var_latency.get()
@@ -208,9 +368,23 @@ class App:
         self.save_config()
         # self.log(f"Latency compensation updated to {val}s")
 
+    def calibrate_latency(self):
+        self.analyzer.set_latency_calibration("calibrate")
+        self.var_latency_auto.set(False)
+        self.log("Latency calibration: measuring during the next run...")
+
+    def toggle_latency_auto(self):
+        self.analyzer.set_latency_calibration("auto" if self.var_latency_auto.get() else "off")
+        self.save_config()
+
+    def on_close(self):
+        self.save_config()  # Compensation adjusted by "auto" latency calibration
+        self.root.destroy()
+
     def toggle_analysis(self):
         if self.analysis_thread and self.analysis_thread.is_alive():
             self.analyzer.stop()
+            self.save_config()  # Keep the compensation "auto" calibration reached
             self.btn_start.config(text="Start Analysis")
             self.log("=== ANALYSIS STOPPED ===")
         else:
@@ -275,3 +449,6 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = App(root)
     root.mainloop()
+    if app.analyzer.telemetry:
+        app.analyzer.telemetry.close()  # Write the buffered events
+    app.logs.close()
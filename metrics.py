@@ -0,0 +1,158 @@
+import json
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+
+class RollingHistogram:
+    """
+    Latency histogram over the last `window` samples, in fixed memory.
+    Buckets are log-spaced between min_value and max_value (seconds); the ring of
+    bucket indices lets the oldest sample be removed in O(1) when a new one arrives.
+    Locked, as stages such as "preprocess" are recorded by every OCR worker.
+    """
+
+    def __init__(self, window=1024, min_value=1e-5, max_value=10.0, buckets=64):
+        self.window = window
+        self.buckets = buckets
+        self.log_min = math.log(min_value)
+        self.log_step = (math.log(max_value) - self.log_min) / buckets
+        self.counts = [0] * buckets
+        self.ring = array('B', bytes(window))  # Bucket index of each sample in the window
+        self.pos = 0
+        self.size = 0
+        self.last = 0.0
+        self.total = 0  # Samples since creation
+        self.lock = threading.Lock()
+
+    def bucket(self, value):
+        if value <= 0:
+            return 0
+        i = int((math.log(value) - self.log_min) / self.log_step)
+        return min(max(i, 0), self.buckets - 1)
+
+    def add(self, value):
+        i = self.bucket(value)
+        with self.lock:
+            if self.size == self.window:
+                self.counts[self.ring[self.pos]] -= 1
+            else:
+                self.size += 1
+            self.ring[self.pos] = i
+            self.counts[i] += 1
+            self.pos = (self.pos + 1) % self.window
+            self.last = value
+            self.total += 1
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, 0.0 when empty"""
+        if not self.size:
+            return 0.0
+        target = max(1, math.ceil(self.size * p / 100.0))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return math.exp(self.log_min + (i + 1) * self.log_step)
+        return math.exp(self.log_min + self.buckets * self.log_step)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "samples": self.size,
+                "total": self.total,
+                "last_ms": self.last * 1000,
+                "p50_ms": self.percentile(50) * 1000,
+                "p90_ms": self.percentile(90) * 1000,
+                "p99_ms": self.percentile(99) * 1000,
+            }
+
+
+class RateCounter:
+    """Events per second over the last `horizon` seconds (bounded memory)"""
+
+    def __init__(self, horizon=5.0, maxlen=4096):
+        self.horizon = horizon
+        self.events = deque(maxlen=maxlen)
+        self.total = 0
+
+    def tick(self, now=None):
+        self.events.append(now if now is not None else time.monotonic())
+        self.total += 1
+
+    def rate(self, now=None):
+        now = now if now is not None else time.monotonic()
+        cutoff = now - self.horizon
+        events = list(self.events)  # Copy in one step, the loop thread keeps appending
+        recent = sum(1 for t in events if t >= cutoff)
+        if not recent:
+            return 0.0
+        # Shorter span right after startup, before a full horizon of events exists
+        span = min(self.horizon, now - events[0])
+        return recent / max(span, 1e-3)
+
+
+class LoopMetrics:
+    """
+    Per-stage timings of the analyzer loop plus FPS and OCR call rates.
+    Stages: capture, preprocess, ocr.<region>, logic, send, and frame
+    (capture timestamp to end of logic).
+    """
+    STAGE_ORDER = ["capture", "preprocess", "ocr.countdown", "ocr.gametype", "ocr.timer", "ocr.level", "logic", "send", "frame"]
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.histograms = {}
+        self.lock = threading.Lock()  # Guards the histogram dict, each histogram has its own lock
+        self.frames = RateCounter()
+        self.ocr_calls = RateCounter()
+        self.started = time.time()
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, RollingHistogram(self.window))
+        histogram.add(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def frame_done(self):
+        self.frames.tick()
+
+    def ocr_call(self):
+        self.ocr_calls.tick()
+
+    def snapshot(self):
+        with self.lock:
+            names = list(self.histograms)
+        stages = sorted(names, key=lambda s: (self.STAGE_ORDER.index(s) if s in self.STAGE_ORDER else len(self.STAGE_ORDER), s))
+        return {
+            "uptime_s": time.time() - self.started,
+            "fps": self.frames.rate(),
+            "ocr_per_s": self.ocr_calls.rate(),
+            "frames": self.frames.total,
+            "ocr_calls": self.ocr_calls.total,
+            "stages": {stage: self.histograms[stage].snapshot() for stage in stages},
+        }
+
+    def format_panel(self):
+        """Compact multi-line text for the GUI"""
+        snap = self.snapshot()
+        lines = [f"FPS {snap['fps']:5.1f}   OCR/s {snap['ocr_per_s']:5.1f}   frames {snap['frames']}"]
+        for stage, stats in snap["stages"].items():
+            lines.append(f"{stage:<14} p50 {stats['p50_ms']:7.2f}  p99 {stats['p99_ms']:7.2f} ms")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
@@ -0,0 +1,216 @@
+import ctypes
+import ctypes.util
+import os
+import numpy as np
+
+# Candidate names for the Tesseract shared library (Linux, macOS, Windows installer)
+TESSERACT_LIBRARY_NAMES = [
+    "libtesseract.so.5",
+    "libtesseract.so.4",
+    "libtesseract.dylib",
+    "libtesseract-5.dll",
+    "libtesseract-4.dll",
+    r"C:\Program Files\Tesseract-OCR\libtesseract-5.dll",
+]
+
+BACKENDS = ("tesserocr", "capi", "pytesseract")
+
+
+class OcrEngine:
+    """
+    A long-lived OCR engine configured for one region.
+    The page segmentation mode and character whitelist are set once at creation,
+    recognize() then only has to hand over the image buffer.
+    """
+    name = "base"
+
+    def __init__(self, psm=7, whitelist=None):
+        self.psm = psm
+        self.whitelist = whitelist
+
+    def recognize(self, img):
+        """Return the text in a grayscale/thresholded (H, W) or BGR (H, W, 3) image"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _image_layout(img):
+        img = np.ascontiguousarray(img)
+        height, width = img.shape[:2]
+        bytes_per_pixel = 1 if img.ndim == 2 else img.shape[2]
+        return img, width, height, bytes_per_pixel
+
+
+class TesserocrEngine(OcrEngine):
+    """In-process engine through the tesserocr bindings"""
+    name = "tesserocr"
+
+    def __init__(self, psm=7, whitelist=None):
+        super().__init__(psm, whitelist)
+        import tesserocr
+        self.api = tesserocr.PyTessBaseAPI(lang="eng", psm=psm)
+        if whitelist:
+            self.api.SetVariable("tessedit_char_whitelist", whitelist)
+
+    def recognize(self, img):
+        img, width, height, bpp = self._image_layout(img)
+        self.api.SetImageBytes(img.tobytes(), width, height, bpp, width * bpp)
+        return self.api.GetUTF8Text().strip()
+
+    def close(self):
+        self.api.End()
+
+
+class _TessCApi:
+    """ctypes prototypes of the libtesseract C API, loaded once per process"""
+    _lib = None
+
+    @classmethod
+    def load(cls):
+        if cls._lib is not None:
+            return cls._lib
+
+        names = list(TESSERACT_LIBRARY_NAMES)
+        found = ctypes.util.find_library("tesseract")
+        if found:
+            names.insert(0, found)
+
+        lib = None
+        for name in names:
+            try:
+                lib = ctypes.CDLL(name)
+                break
+            except OSError:
+                continue
+        if lib is None:
+            raise OSError("libtesseract not found")
+
+        handle = ctypes.c_void_p
+        lib.TessBaseAPICreate.restype = handle
+        lib.TessBaseAPICreate.argtypes = []
+        lib.TessBaseAPIInit3.restype = ctypes.c_int
+        lib.TessBaseAPIInit3.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetPageSegMode.restype = None
+        lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPISetVariable.restype = ctypes.c_int
+        lib.TessBaseAPISetVariable.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetImage.restype = None
+        lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p  # Must be released with TessDeleteText
+        lib.TessBaseAPIGetUTF8Text.argtypes = [handle]
+        lib.TessDeleteText.restype = None
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIEnd.restype = None
+        lib.TessBaseAPIEnd.argtypes = [handle]
+        lib.TessBaseAPIDelete.restype = None
+        lib.TessBaseAPIDelete.argtypes = [handle]
+
+        cls._lib = lib
+        return lib
+
+
+class CApiEngine(OcrEngine):
+    """In-process engine calling libtesseract directly through ctypes"""
+    name = "capi"
+
+    def __init__(self, psm=7, whitelist=None):
+        super().__init__(psm, whitelist)
+        self.lib = _TessCApi.load()
+        self.handle = self.lib.TessBaseAPICreate()
+
+        datapath = os.environ.get("TESSDATA_PREFIX")
+        datapath = datapath.encode() if datapath else None
+        if self.lib.TessBaseAPIInit3(self.handle, datapath, b"eng") != 0:
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+            raise RuntimeError("TessBaseAPIInit3 failed (is the 'eng' traineddata installed?)")
+
+        self.lib.TessBaseAPISetPageSegMode(self.handle, psm)
+        if whitelist:
+            self.lib.TessBaseAPISetVariable(self.handle, b"tessedit_char_whitelist", whitelist.encode())
+
+    def recognize(self, img):
+        img, width, height, bpp = self._image_layout(img)
+        # Tesseract reads straight from the NumPy buffer, no temp file or copy
+        self.lib.TessBaseAPISetImage(self.handle, img.ctypes.data, width, height, bpp, width * bpp)
+        text_ptr = self.lib.TessBaseAPIGetUTF8Text(self.handle)
+        if not text_ptr:
+            return ""
+        try:
+            return ctypes.string_at(text_ptr).decode("utf-8", errors="replace").strip()
+        finally:
+            self.lib.TessDeleteText(text_ptr)
+
+    def close(self):
+        if self.handle:
+            self.lib.TessBaseAPIEnd(self.handle)
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+
+
+_tesseract_located = False
+
+
+def locate_tesseract(pytesseract):
+    """
+    Check once that the tesseract executable can be found, otherwise point
+    pytesseract at the Windows default install. Runs when the first pytesseract
+    engine is created rather than at import, since it spawns a subprocess.
+    """
+    global _tesseract_located
+    if _tesseract_located:
+        return
+    _tesseract_located = True
+    # If the user has it elsewhere, they might need to set tesseract_cmd themselves
+    try:
+        pytesseract.get_tesseract_version()
+    except pytesseract.TesseractNotFoundError:
+        print("Tesseract not found in PATH. Trying default location...", flush=True)
+        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+
+class PytesseractEngine(OcrEngine):
+    """Fallback: one tesseract subprocess per call"""
+    name = "pytesseract"
+
+    def __init__(self, psm=7, whitelist=None):
+        super().__init__(psm, whitelist)
+        import pytesseract
+        locate_tesseract(pytesseract)
+        self.pytesseract = pytesseract
+        self.config = f"--psm {psm}"
+        if whitelist:
+            self.config += f" -c tessedit_char_whitelist={whitelist}"
+
+    def recognize(self, img):
+        return self.pytesseract.image_to_string(img, config=self.config).strip()
+
+
+ENGINE_CLASSES = {
+    "tesserocr": TesserocrEngine,
+    "capi": CApiEngine,
+    "pytesseract": PytesseractEngine,
+}
+
+
+def create_engine(psm=7, whitelist=None, backend="auto"):
+    """
+    Create an OCR engine for one region.
+    backend: "auto" tries tesserocr, then the C API, then pytesseract.
+    Any other value forces that backend (still falling back to pytesseract on failure).
+    """
+    if backend == "auto":
+        candidates = list(BACKENDS)
+    else:
+        candidates = [backend, "pytesseract"]
+
+    last_error = None
+    for name in candidates:
+        try:
+            return ENGINE_CLASSES[name](psm=psm, whitelist=whitelist)
+        except (ImportError, OSError, RuntimeError, AttributeError, KeyError) as e:
+            last_error = e
+            continue
+    raise RuntimeError(f"No OCR backend available: {last_error}")
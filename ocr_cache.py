@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class OcrCache:
+    """
+    Change detection + bounded LRU cache between preprocessing and OCR.
+    Thresholded region bitmaps are hashed; an identical bitmap to the previous
+    frame of the same region is "unchanged", any other bitmap seen before is a
+    cache hit. Only misses need to go through OCR.
+    Safe to share between OCR worker threads; the reader runs outside the lock.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> recognized text
+        self.last_keys = {}           # region -> key of the previous frame
+
+        # Counters
+        self.unchanged = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(region, img):
+        """
+        Hash of a region bitmap (shape is included so crops of different size never collide).
+        The pixels are hashed in place; only a non-contiguous view is copied.
+        """
+        digest = hashlib.blake2b(memoryview(np.ascontiguousarray(img)).cast("B"), digest_size=16).digest()
+        return (region, img.shape, digest)
+
+    def recognize(self, region, img, reader):
+        """Return the text for img, calling reader(img) only on a cache miss"""
+        key = self.key(region, img)
+
+        with self.lock:
+            if self.last_keys.get(region) == key and key in self.entries:
+                self.unchanged += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.last_keys[region] = key
+
+            text = self.entries.get(key)
+            if text is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return text
+            self.misses += 1
+
+        text = reader(img)
+        with self.lock:
+            self.entries[key] = text
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return text
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.last_keys.clear()
+
+    def stats(self):
+        total = self.unchanged + self.hits + self.misses
+        skipped = self.unchanged + self.hits
+        return {
+            "unchanged": self.unchanged,
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "skip_ratio": skipped / total if total else 0.0,
+        }
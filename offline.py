@@ -0,0 +1,164 @@
+"""
+Offline analysis of recorded runs.
+
+Runs the Analyzer split logic over a VOD (anything cv2.VideoCapture opens) or a
+PNG sequence and writes the resulting splits and game times to a file:
+
+    python offline.py run.mp4 --config config.json --out run_splits.jsonl --workers 4
+
+With several workers the video is cut into time ranges that are OCR'd in parallel
+processes. The state logic itself is cheap, so it is replayed afterwards over the
+concatenated OCR results in order, which stitches the state across shard boundaries.
+
+Templates learned from a recording (timer digits, countdown, banner fingerprints)
+differ from live captures, so they never touch the GUI's files: they go to a
+scratch directory, or to --templates DIR to reuse them on the next analysis.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzer import Analyzer
+from frame_source import open_recording
+from livesplit_client import RecordingLiveSplitClient
+from config import load_config, region_settings
+
+
+def load_regions(config_path):
+    """Analyzer settings that apply to a recording: regions, preprocessing and route"""
+    config = load_config(config_path)
+    settings = region_settings(config)
+    settings["preprocess_config"] = config.get("preprocess")
+    settings["route"] = config.get("route")
+    return settings
+
+
+def make_analyzer(regions, source, ocr_backend="auto", template_dir=None):
+    if template_dir:
+        os.makedirs(template_dir, exist_ok=True)
+    else:
+        template_dir = tempfile.mkdtemp(prefix="offline_")
+    client = RecordingLiveSplitClient()
+    analyzer = Analyzer(
+        client,
+        timer_template_path=os.path.join(template_dir, "timer_templates.npz"),
+        countdown_template_path=os.path.join(template_dir, "countdown_templates.npz"),
+        banner_fingerprint_path=os.path.join(template_dir, "banner_fingerprints.npz"),
+        latency_compensation=0.0,  # Nothing to compensate on a recording
+        pipelined=False,
+        ocr_backend=ocr_backend,
+        frame_source=source,
+        **regions
+    )
+    analyzer.running = True
+    return analyzer
+
+
+def analyze_serial(path, regions, sample_fps=10, fps=30.0, ocr_backend="auto", template_dir=None):
+    """Single process: only the regions enabled in the current state are OCR'd"""
+    source = open_recording(path, sample_fps=sample_fps, fps=fps)
+    analyzer = make_analyzer(regions, source, ocr_backend, template_dir)
+    analyzer.open_ocr_engines()
+    try:
+        with source:
+            while True:
+                grabbed = analyzer.capture_regions(analyzer.enabled_regions())
+                if grabbed is None:
+                    break
+                capture_time, frames = grabbed
+                analyzer.livesplit.current_time = capture_time
+                analyzer.handle_frame(analyzer.recognize_frame(frames), capture_time)
+    finally:
+        analyzer.close_ocr_engines()
+        analyzer.timer_recognizer.save()
+        analyzer.countdown_detector.save()
+        analyzer.banner_classifier.save()
+    return analyzer.livesplit
+
+
+def ocr_shard(args):
+    """
+    Worker: OCR every region of every sampled frame in [start, end).
+    The state is unknown inside a shard, so all regions are read.
+    Returns a list of (media_time, {region: text}).
+    """
+    path, regions, start, end, sample_fps, fps, ocr_backend, template_dir = args
+    source = open_recording(path, start=start, end=end, sample_fps=sample_fps, fps=fps)
+    analyzer = make_analyzer(regions, source, ocr_backend, template_dir)
+    # Shards run concurrently: none of them writes the shared template files
+    for learner in (analyzer.timer_recognizer, analyzer.countdown_detector, analyzer.banner_classifier):
+        learner.autosave = False
+    analyzer.open_ocr_engines()
+
+    observations = []
+    try:
+        with source:
+            while True:
+                grabbed = analyzer.capture_regions(Analyzer.REGION_NAMES)
+                if grabbed is None:
+                    break
+                capture_time, frames = grabbed
+                observations.append((capture_time, analyzer.recognize_frame(frames)))
+    finally:
+        analyzer.close_ocr_engines()
+    return observations
+
+
+def replay(observations, regions, source):
+    """Run the state logic over OCR results in order, as if only enabled regions had been read"""
+    analyzer = make_analyzer(regions, source)
+    for capture_time, texts in observations:
+        enabled = analyzer.enabled_regions()
+        analyzer.livesplit.current_time = capture_time
+        analyzer.handle_frame({name: text for name, text in texts.items() if name in enabled}, capture_time)
+    return analyzer.livesplit
+
+
+def analyze_sharded(path, regions, workers, sample_fps=10, fps=30.0, ocr_backend="auto", template_dir=None):
+    source = open_recording(path, sample_fps=sample_fps, fps=fps)
+    duration = source.duration()
+    shard_length = duration / workers
+    shards = [
+        (path, regions, i * shard_length, (i + 1) * shard_length if i < workers - 1 else None, sample_fps, fps, ocr_backend, template_dir)
+        for i in range(workers)
+    ]
+
+    observations = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for shard in pool.map(ocr_shard, shards):
+            observations.extend(shard)
+    return replay(observations, regions, source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a recorded run and write its splits and game times")
+    parser.add_argument("recording", help="Video file, PNG directory or PNG glob pattern")
+    parser.add_argument("--config", default="config.json", help="Config with regions in video pixel coordinates")
+    parser.add_argument("--out", default=None, help="Output file (default: <recording>_splits.jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel OCR processes")
+    parser.add_argument("--sample-fps", type=float, default=10, help="Frames analyzed per second of video")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of a PNG sequence")
+    parser.add_argument("--ocr-backend", default="auto", help="tesserocr, capi, pytesseract or auto")
+    parser.add_argument("--templates", default=None, help="Directory for templates learned from recordings (default: a scratch directory)")
+    args = parser.parse_args()
+
+    regions = load_regions(args.config)
+    out = args.out or os.path.splitext(args.recording.rstrip("/\\*"))[0] + "_splits.jsonl"
+
+    started = time.time()
+    if args.workers > 1:
+        client = analyze_sharded(args.recording, regions, args.workers, args.sample_fps, args.fps, args.ocr_backend, args.templates)
+    else:
+        client = analyze_serial(args.recording, regions, args.sample_fps, args.fps, args.ocr_backend, args.templates)
+    client.save(out)
+
+    print(f"\n{len(client.events)} timer events written to {out} in {time.time() - started:.1f}s", flush=True)
+    for event in client.events:
+        gametime = f"{event['gametime']:.2f}s" if event['gametime'] is not None else "-"
+        print(f"  {event['time']:>9.2f}s  {event['command']:<10} game time {gametime}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from log_queue import ERROR
+
+
+class AnalysisPipeline:
+    """
+    Pipelined capture -> OCR -> state logic for an Analyzer.
+    - A capture thread grabs the enabled regions, stamps them with the capture time
+      and submits every region to a pool of OCR workers.
+    - Frames in flight wait in a bounded queue, so capture blocks instead of piling
+      up frames when OCR falls behind.
+    - The calling thread consumes results in capture order and runs the state logic.
+    A slow Tesseract call on one region no longer delays the other regions.
+    executor: an existing pool to submit OCR work to (e.g. one shared by several
+    analyzers, see host.py) instead of a private one. run() only returns once
+    every OCR job it submitted has finished, so the analyzer can close its
+    engines; jobs still queued when the analyzer stops do nothing.
+    """
+
+    def __init__(self, analyzer, workers=None, max_in_flight=3, executor=None):
+        self.analyzer = analyzer
+        self.workers = workers or len(analyzer.REGION_NAMES)
+        self.executor = executor
+        self.jobs = queue.Queue(maxsize=max_in_flight)
+        # Each region has a single OCR engine, so a region is only OCR'd by one worker at a time
+        self.region_locks = {name: threading.Lock() for name in analyzer.REGION_NAMES}
+        self.capture_thread = None
+        self.submit_lock = threading.RLock()  # RLock: a done callback can run inside _submit
+        self.closed = False  # Set when run() ends: nothing is submitted any more
+        self.pending = set()  # Submitted OCR futures not done yet
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_processed = 0
+
+    def _recognize(self, name, img, capture_time):
+        if not self.analyzer.running:
+            return ""  # Queued behind other streams' work until after the stop
+        with self.region_locks[name]:
+            return self.analyzer.recognize_one(name, img, capture_time)
+
+    def _submit(self, executor, frames, capture_time):
+        """OCR futures for a frame, None once run() has ended"""
+        with self.submit_lock:
+            if self.closed or not self.analyzer.running:
+                return None
+            futures = {name: executor.submit(self._recognize, name, img, capture_time) for name, img in frames.items()}
+            for future in futures.values():
+                self.pending.add(future)
+                future.add_done_callback(self._done)
+        return futures
+
+    def _done(self, future):
+        with self.submit_lock:
+            self.pending.discard(future)
+
+    def _put(self, job):
+        """Blocking put that gives up once the analyzer is stopped"""
+        while self.analyzer.running:
+            try:
+                self.jobs.put(job, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _capture_loop(self, executor):
+        try:
+            with self.analyzer.frame_source:
+                while self.analyzer.running:
+                    names = self.analyzer.next_regions()
+                    if not names:
+                        break
+                    grabbed = self.analyzer.capture_regions(names)
+                    if grabbed is None:
+                        self.analyzer.log("Frame source exhausted")
+                        self.analyzer.running = False
+                        break
+                    capture_time, frames = grabbed
+                    futures = self._submit(executor, frames, capture_time)
+                    if futures is None:
+                        break
+                    self.frames_captured += 1
+                    if not self._put((capture_time, futures)):
+                        break
+        except Exception as e:
+            self.analyzer.log(f"FATAL ERROR in capture thread: {e}", level=ERROR)
+            traceback.print_exc()
+            self.analyzer.running = False
+
+    def run(self):
+        """Run until analyzer.running is cleared. Blocks the calling thread."""
+        if self.executor is not None:
+            self._run(self.executor)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr") as executor:
+            self._run(executor)
+
+    def _run(self, executor):
+        self.closed = False
+        self.capture_thread = threading.Thread(target=self._capture_loop, args=(executor,), daemon=True)
+        self.capture_thread.start()
+
+        while self.analyzer.running:
+            try:
+                capture_time, futures = self.jobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            try:
+                texts = {name: future.result() for name, future in futures.items()}
+                self.analyzer.complete_frame(texts, capture_time)
+                self.frames_processed += 1
+            except Exception as e:
+                self.analyzer.log(f"ERROR in frame processing: {e}", level=ERROR)
+                traceback.print_exc()
+
+        self.capture_thread.join(timeout=2)
+        # The capture thread may still be blocked in grab(): stop it from submitting,
+        # then wait for the jobs a (possibly shared) pool is running with our engines
+        with self.submit_lock:
+            self.closed = True
+            pending = list(self.pending)
+        wait(pending)
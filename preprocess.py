@@ -0,0 +1,101 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "area": cv2.INTER_AREA,
+}
+
+# Defaults per region, overridable with the "preprocess" section of config.json
+DEFAULT_SETTINGS = {"scale": 3, "threshold": 140, "interpolation": "linear", "crop": True, "padding": 6}
+REGION_DEFAULTS = {
+    "countdown": {"scale": 1},  # The countdown digit is already huge
+}
+
+
+class RegionPreprocessor:
+    """
+    Compiled preprocessing for one region, reusing preallocated buffers.
+    - Grayscale conversion and threshold run at native resolution
+    - The result is cropped to the bounding box of the text
+    - Only that crop is scaled (then re-binarized) and padded for Tesseract
+    The returned image is a buffer owned by the preprocessor: it is overwritten by
+    the next call, so copy it if it has to outlive the current frame.
+    """
+    MAX_SHAPES = 8  # Buffers kept for distinct crop sizes (text width changes, e.g. 9:59 -> 10:00)
+
+    def __init__(self, scale=3, threshold=140, interpolation="linear", crop=True, padding=6):
+        self.scale = scale
+        self.threshold = threshold
+        self.interpolation = INTERPOLATIONS[interpolation] if isinstance(interpolation, str) else interpolation
+        self.crop = crop
+        self.padding = padding
+
+        self.gray = None
+        self.binary = None
+        self.buffers = OrderedDict()  # (kind, shape) -> array
+
+    def _buffer(self, kind, shape):
+        key = (kind, shape)
+        buf = self.buffers.get(key)
+        if buf is None:
+            buf = np.empty(shape, dtype=np.uint8)
+            self.buffers[key] = buf
+            if len(self.buffers) > self.MAX_SHAPES * 2:
+                self.buffers.popitem(last=False)
+        else:
+            self.buffers.move_to_end(key)
+        return buf
+
+    def __call__(self, img):
+        h, w = img.shape[:2]
+        if self.gray is None or self.gray.shape != (h, w):
+            self.gray = np.empty((h, w), dtype=np.uint8)
+            self.binary = np.empty((h, w), dtype=np.uint8)
+
+        if img.ndim == 2:
+            self.gray[...] = img
+        elif img.shape[2] == 4:
+            cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY, dst=self.gray)
+        else:
+            cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=self.gray)
+
+        # Simple threshold for white text on dark background
+        cv2.threshold(self.gray, self.threshold, 255, cv2.THRESH_BINARY, dst=self.binary)
+
+        out = self.binary
+        if self.crop:
+            x, y, cw, ch = cv2.boundingRect(self.binary)  # Bounding box of non-zero pixels
+            if cw and ch:
+                out = self.binary[y:y + ch, x:x + cw]
+
+        if self.scale != 1:
+            oh, ow = out.shape
+            scaled = self._buffer("scaled", (oh * self.scale, ow * self.scale))
+            cv2.resize(out, (ow * self.scale, oh * self.scale), dst=scaled, interpolation=self.interpolation)
+            # Interpolation leaves grey edges, binarize again so bitmaps stay stable for hashing
+            cv2.threshold(scaled, 127, 255, cv2.THRESH_BINARY, dst=scaled)
+            out = scaled
+
+        if self.padding:
+            p = self.padding
+            oh, ow = out.shape
+            padded = self._buffer("padded", (oh + 2 * p, ow + 2 * p))
+            cv2.copyMakeBorder(out, p, p, p, p, cv2.BORDER_CONSTANT, dst=padded, value=0)
+            out = padded
+        return out
+
+
+def build_preprocessors(region_names, config=None):
+    """One RegionPreprocessor per region from defaults + the optional config section"""
+    config = config or {}
+    preprocessors = {}
+    for name in region_names:
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update(REGION_DEFAULTS.get(name, {}))
+        settings.update(config.get(name, {}))
+        preprocessors[name] = RegionPreprocessor(**settings)
+    return preprocessors
@@ -0,0 +1,280 @@
+"""
+Declarative route definitions compiled into a state machine.
+
+A route lists the levels of a category and the states of the analyzer. Each
+state has triggers: a region, a matcher for its text and what happens on a
+match (an action run by the Analyzer and/or a transition). The regions OCR'd
+in a state are exactly those its triggers (and "read" list) refer to, so a
+region is never captured while nothing in the current state looks at it.
+
+State keys:
+- "phase": scheduler phase ("pre_run" / "running", see scheduler.py)
+- "read": regions read every frame without a trigger (e.g. the timer for game time)
+- "each_frame": actions run on every frame in this state
+- "triggers": list of {"region": ..., <matcher>, "action": ..., "goto": ..., "cooldown": s, "frames": n}
+  ("frames": the matcher has to hold on n consecutive readings of the region, default 1)
+- "extends": name of a state whose read/each_frame/triggers come first
+
+Matchers (one per trigger, text comparisons ignore case):
+- "equals": [texts]     the whole text is one of these
+- "contains": [texts]   the text contains one of these
+- "regex": pattern      re.search on the text
+- "time_jump": seconds  the timer read at least this much higher than the previous reading
+- "later_level": true   the text is a level that comes after the current one
+
+"level" is a template expanded into one state per level, named "level:<name>";
+"level:<name>" entries add triggers to one level only. Transition targets
+"$first_level" and "$level" (the level that matched) refer to those states.
+Routes can be given inline or as a JSON file path under "route" in config.json.
+"""
+import json
+import re
+
+REGION_NAMES = ("countdown", "gametype", "timer", "level")
+MATCHERS = ("equals", "contains", "regex", "time_jump", "later_level")
+
+# The EVA Zombies route the analyzer always used
+DEFAULT_ROUTE = {
+    "name": "EVA Zombies",
+    "levels": ["Isolation", "Lab", "Top Floor", "Reactor", "Hangar"],
+    "initial": "lobby",
+    "states": {
+        # Waiting for a countdown; the game type is detected in parallel
+        "lobby": {
+            "phase": "pre_run",
+            "triggers": [
+                {"region": "gametype", "contains": ["ZOMBIES", "SURVIVAL"], "action": "gametype_detected"},
+                {"region": "countdown", "equals": ["3"], "goto": "countdown"},
+            ],
+        },
+        # Saw "3": the 3 -> 2 transition arms the start detection
+        "countdown": {
+            "phase": "pre_run",
+            "extends": "lobby",
+            "triggers": [
+                {"region": "countdown", "equals": ["2"], "action": "countdown_done", "goto": "armed", "cooldown": 10},
+                {"region": "countdown", "regex": "^(?![123]$)\\S", "goto": "lobby"},
+            ],
+        },
+        # Countdown over: the run starts when the timer jumps up (lobby time -> 30:00)
+        "armed": {
+            "phase": "pre_run",
+            "triggers": [
+                {"region": "timer", "time_jump": 600, "action": "start_run", "goto": "$first_level"},
+            ],
+        },
+        "level": {
+            "phase": "running",
+            "read": ["timer"],
+            "each_frame": ["gametime"],
+            "triggers": [
+                {"region": "level", "equals": ["ZOMBIES"], "action": "split"},
+                {"region": "level", "later_level": True, "action": "level_split", "goto": "$level"},
+                {"region": "level", "equals": ["VICTOIRE", "SCORE"], "action": "finish", "goto": "lobby"},
+            ],
+        },
+        # At Hangar the game type leaving ZOMBIES (another mode's name, not OCR noise) also ends the run
+        "level:Hangar": {
+            "triggers": [
+                {"region": "gametype", "regex": "^(?!.*ZOMB).*[A-Z]{4}", "frames": 5, "action": "finish", "goto": "finished"},
+            ],
+        },
+        # After a finish detected on the game type: only watch for the next countdown
+        "finished": {
+            "phase": "pre_run",
+            "triggers": [
+                {"region": "countdown", "equals": ["3"], "goto": "countdown"},
+            ],
+        },
+    },
+}
+
+
+class Trigger:
+    def __init__(self, spec, actions=None):
+        self.region = spec["region"]
+        if self.region not in REGION_NAMES:
+            raise ValueError(f"Unknown region '{self.region}' in route trigger {spec}")
+        kinds = [kind for kind in MATCHERS if kind in spec]
+        if len(kinds) != 1:
+            raise ValueError(f"Route trigger needs exactly one of {', '.join(MATCHERS)}: {spec}")
+        self.kind = kinds[0]
+        self.value = spec[self.kind]
+        if self.kind in ("equals", "contains"):
+            self.value = [str(v) for v in self.value]
+            self.upper = [v.upper() for v in self.value]
+        elif self.kind == "regex":
+            self.pattern = re.compile(self.value, re.IGNORECASE)
+        self.action = spec.get("action")
+        if self.action and actions is not None and self.action not in actions:
+            raise ValueError(f"Unknown route action '{self.action}'")
+        self.goto = spec.get("goto")
+        self.cooldown = spec.get("cooldown", 0)
+        self.frames = max(1, int(spec.get("frames", 1)))
+        self.last_fired = float("-inf")
+        self.streak = 0  # Consecutive readings the matcher held on
+        self.streak_start = None  # Capture time of the streak's first reading
+
+    def match(self, text, state, route, seconds):
+        """Matched value (canonical text, level, jump) or None"""
+        if self.kind == "equals":
+            upper = text.strip().upper()
+            return next((v for v, u in zip(self.value, self.upper) if u == upper), None)
+        if self.kind == "contains":
+            upper = text.upper()
+            return text if any(u in upper for u in self.upper) else None
+        if self.kind == "regex":
+            return text if self.pattern.search(text) else None
+        if self.kind == "time_jump":
+            if seconds is None or route.last_time is None or seconds - route.last_time < self.value:
+                return None
+            return seconds
+        # later_level
+        upper = text.strip().upper()
+        start = route.levels.index(state.level) + 1 if state.level else 0
+        return next((level for level in route.levels[start:] if level.upper() == upper), None)
+
+
+class RouteState:
+    def __init__(self, name, phase, read, each_frame, triggers, level=None):
+        self.name = name
+        self.phase = phase
+        self.each_frame = list(each_frame)
+        self.triggers = triggers
+        self.level = level
+        used = set(read) | {trigger.region for trigger in triggers}
+        self.regions = tuple(name for name in REGION_NAMES if name in used)
+
+
+class Route:
+    """
+    Compiled route: the current state, the regions it needs and step() to run
+    its triggers on one frame of OCR results.
+    """
+
+    def __init__(self, definition=None, actions=None):
+        definition = definition or DEFAULT_ROUTE
+        self.name = definition.get("name", "route")
+        self.levels = list(definition.get("levels", []))
+        specs = definition["states"]
+        self.states = {}
+
+        def resolve(name, seen=()):
+            spec = dict(specs[name])
+            base = spec.get("extends")
+            if base:
+                if base in seen or base not in specs:
+                    raise ValueError(f"Bad 'extends' in route state '{name}'")
+                parent = resolve(base, seen + (name,))
+                spec["phase"] = spec.get("phase", parent.get("phase"))
+                for key in ("read", "each_frame", "triggers"):
+                    spec[key] = parent.get(key, []) + spec.get(key, [])
+            return spec
+
+        for name in specs:
+            if name == "level" or name.startswith("level:"):
+                continue
+            spec = resolve(name)
+            self.states[name] = self._compile(name, spec, actions)
+
+        if self.levels:
+            template = resolve("level") if "level" in specs else {}
+            for level in self.levels:
+                extra = specs.get(f"level:{level}", {})
+                spec = dict(template)
+                spec["triggers"] = template.get("triggers", []) + extra.get("triggers", [])
+                spec["read"] = template.get("read", []) + extra.get("read", [])
+                spec["each_frame"] = template.get("each_frame", []) + extra.get("each_frame", [])
+                spec["phase"] = extra.get("phase", template.get("phase", "running"))
+                self.states[f"level:{level}"] = self._compile(f"level:{level}", spec, actions, level)
+
+        for state in self.states.values():
+            for trigger in state.triggers:
+                if trigger.goto and not trigger.goto.startswith("$") and trigger.goto not in self.states:
+                    raise ValueError(f"Route state '{state.name}' goes to unknown state '{trigger.goto}'")
+
+        self.initial = definition.get("initial", next(iter(self.states)))
+        self.current = self.states[self.initial]
+        self.last_time = None  # Previous timer reading, for time_jump
+
+    @staticmethod
+    def _compile(name, spec, actions, level=None):
+        triggers = [Trigger(t, actions) for t in spec.get("triggers", [])]
+        for action in spec.get("each_frame", []):
+            if actions is not None and action not in actions:
+                raise ValueError(f"Unknown route action '{action}'")
+        return RouteState(name, spec.get("phase", "pre_run"), spec.get("read", []), spec.get("each_frame", []), triggers, level)
+
+    def enter(self, state):
+        if state.phase != "running" and self.current.phase == "running":
+            self.last_time = None  # A time_jump compares pre-run readings only, not the last run's timer
+        self.current = state
+        for trigger in state.triggers:
+            trigger.streak = 0
+
+    def reset(self):
+        self.enter(self.states[self.initial])
+        self.last_time = None
+
+    def regions(self):
+        """Regions the current state needs"""
+        return self.current.regions
+
+    def vocabulary(self, region):
+        """Every text an "equals" trigger on this region can expect, plus the level names for "level\""""
+        words = list(self.levels) if region == "level" else []
+        for state in self.states.values():
+            for trigger in state.triggers:
+                if trigger.region == region and trigger.kind == "equals":
+                    words.extend(v for v in trigger.value if v not in words)
+        return words
+
+    def target(self, trigger, match):
+        if trigger.goto == "$first_level":
+            return f"level:{self.levels[0]}"
+        if trigger.goto == "$level":
+            return f"level:{match}"
+        return trigger.goto
+
+    def step(self, texts, now, parse_time, capture_time=None):
+        """
+        Run the current state's triggers on the regions read this frame, in order.
+        Returns [(trigger, match)] that fired; the first transition ends the step.
+        A fired trigger's streak_start is the capture time of the first reading of
+        its streak (this frame's when "frames" is 1).
+        """
+        capture_time = now if capture_time is None else capture_time
+        state = self.current
+        seconds = parse_time(texts["timer"]) if "timer" in texts else None
+        fired = []
+        for trigger in state.triggers:
+            if trigger.region not in texts or now - trigger.last_fired < trigger.cooldown:
+                continue
+            match = trigger.match(texts[trigger.region], state, self, seconds)
+            if match is None:
+                trigger.streak = 0
+                continue
+            trigger.streak += 1
+            if trigger.streak == 1:
+                trigger.streak_start = capture_time
+            if trigger.streak < trigger.frames:
+                continue
+            trigger.streak = 0
+            trigger.last_fired = now
+            fired.append((trigger, match))
+            if trigger.goto:
+                self.enter(self.states[self.target(trigger, match)])
+                break
+        if seconds is not None:
+            self.last_time = seconds
+        return fired
+
+
+def load_route(setting):
+    """Route definition from the config "route" setting: None (default), a dict or a JSON file path"""
+    if not setting:
+        return DEFAULT_ROUTE
+    if isinstance(setting, dict):
+        return setting
+    with open(setting, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,100 @@
+import threading
+import time
+
+# Target OCR rate (frames per second) of each region, per phase of the run
+DEFAULT_RATES = {
+    # Waiting for a run: the countdown 3 -> 2 transition must be caught quickly
+    "pre_run": {"countdown": 15.0, "gametype": 4.0, "timer": 8.0, "level": 2.0},
+    # During a run: game time is extrapolated between timer reads (gametime.py),
+    # so a few timer reads per second are enough; the level banner changes rarely
+    "running": {"countdown": 1.0, "gametype": 2.0, "timer": 3.0, "level": 3.0},
+}
+
+
+class RegionScheduler:
+    """
+    Decides which regions are due for OCR on each loop iteration.
+    Every region has a target rate depending on the phase of the run. Processing
+    time is measured against a CPU budget (fraction of one core); when the loop
+    spends more than that, or regions fall behind schedule, all intervals are
+    stretched by a back-off factor that relaxes again once there is headroom.
+    """
+    MAX_BACKOFF = 8.0
+    UPDATE_INTERVAL = 1.0  # Seconds between budget checks
+
+    def __init__(self, rates=None, cpu_budget=0.5):
+        self.rates = {phase: dict(r) for phase, r in DEFAULT_RATES.items()}
+        for phase, r in (rates or {}).items():
+            self.rates.setdefault(phase, {}).update(r)
+        self.cpu_budget = cpu_budget
+        self.backoff = 1.0
+        self.next_due = {}  # region -> monotonic time it is next due
+
+        # Busy time accumulated by capture/OCR threads since the last budget check
+        self.lock = threading.Lock()
+        self.busy = 0.0
+        self.window_start = time.monotonic()
+        self.utilization = 0.0
+        self.late = 0
+
+    def interval(self, region, phase):
+        rate = self.rates.get(phase, {}).get(region, 5.0)
+        return self.backoff / rate if rate > 0 else float("inf")
+
+    def add_busy(self, seconds):
+        with self.lock:
+            self.busy += seconds
+
+    def _update_budget(self, now):
+        elapsed = now - self.window_start
+        if elapsed < self.UPDATE_INTERVAL:
+            return
+        with self.lock:
+            busy, self.busy = self.busy, 0.0
+        self.window_start = now
+        self.utilization = busy / elapsed
+
+        if self.utilization > self.cpu_budget or self.late:
+            self.backoff = min(self.backoff * 1.25, self.MAX_BACKOFF)
+        elif self.utilization < self.cpu_budget * 0.7:
+            self.backoff = max(self.backoff / 1.1, 1.0)
+        self.late = 0
+
+    def due(self, regions, phase, now=None):
+        """
+        Regions (from the enabled list) that should be OCR'd now; they are rescheduled.
+        Regions no longer enabled lose their schedule, so one enabled again by a
+        state change starts fresh instead of counting as late.
+        """
+        now = now if now is not None else time.monotonic()
+        self._update_budget(now)
+        for region in [r for r in self.next_due if r not in regions]:
+            del self.next_due[region]
+
+        due = []
+        for region in regions:
+            interval = self.interval(region, phase)
+            next_due = self.next_due.get(region)
+            if next_due is None:
+                # Newly enabled: due now, then at its normal rate
+                self.next_due[region] = now + interval
+                due.append(region)
+                continue
+            if now < next_due:
+                continue
+            if now - next_due > interval:
+                self.late += 1  # Missed a whole slot, processing is falling behind
+                next_due = now
+            self.next_due[region] = max(next_due, now - interval) + interval
+            due.append(region)
+        return due
+
+    def time_until_due(self, regions, now=None):
+        """Seconds until the next of these regions is due (0 when one already is)"""
+        now = now if now is not None else time.monotonic()
+        if not regions:
+            return 0.1
+        return max(0.0, min(self.next_due.get(region, 0.0) for region in regions) - now)
+
+    def stats(self):
+        return {"backoff": self.backoff, "utilization": self.utilization, "cpu_budget": self.cpu_budget}
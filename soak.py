@@ -0,0 +1,256 @@
+"""
+Long-running soak test: the full analyzer (pipeline, scheduler, OCR, LiveSplit
+client) against the fake LiveSplit Server, fed by synthetic runs or a looped
+recording, for hours.
+
+    python soak.py --minutes 240 --out soak.jsonl
+    python soak.py --recording run.mp4 --config config.json --minutes 60
+
+Every --report-interval seconds a sample is printed and appended to --out:
+RSS, thread counts, commands/s received by the server, FPS and OCR rate, and
+(for synthetic runs) how many of the expected starts and splits arrived on
+time. The exit status is 1 when RSS grew more than --max-rss-growth MB after the
+first sample, the thread count grew, splits were missed or extra, or the
+analyzer stopped by itself.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from analyzer import Analyzer
+from config import load_config, region_settings
+from fake_livesplit import FakeLiveSplitServer
+from frame_source import FrameSource, open_recording
+from livesplit_client import LiveSplitClient
+from log_queue import LogQueue
+from synthetic import SyntheticFrameSource
+
+
+def rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def native_threads():
+    """OS threads of this process (Python threads plus those of native libraries)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+
+class LoopingFrameSource(FrameSource):
+    """Plays a recording over and over, with media time increasing across loops"""
+    realtime = False
+
+    def __init__(self, path, sample_fps=10):
+        self.path = path
+        self.sample_fps = sample_fps
+        self.source = None
+        self.offset = 0.0
+        self.last_time = 0.0
+        self.loops = 0
+
+    def open(self):
+        self.source = open_recording(self.path, sample_fps=self.sample_fps)
+        self.source.open()
+
+    def close(self):
+        if self.source:
+            self.source.close()
+            self.source = None
+
+    def grab(self, regions):
+        grabbed = self.source.grab(regions)
+        if grabbed is None:
+            self.close()
+            self.offset = self.last_time + 1.0 / self.sample_fps
+            self.loops += 1
+            self.open()
+            grabbed = self.source.grab(regions)
+            if grabbed is None:
+                return None  # Empty recording
+        timestamp, frames = grabbed
+        self.last_time = self.offset + timestamp
+        return self.last_time, frames
+
+
+def score_events(expected, actual, tolerance):
+    """
+    Match expected (time, command) events to the server's recorded ones within
+    tolerance seconds, in order. Returns {expected, matched, missed, extra, max_error_s}.
+    """
+    unmatched = list(actual)
+    matched, max_error = 0, 0.0
+    for when, command in expected:
+        for i, event in enumerate(unmatched):
+            if event["command"] == command and abs(event["time"] - when) <= tolerance:
+                max_error = max(max_error, abs(event["time"] - when))
+                del unmatched[i]
+                matched += 1
+                break
+    horizon = expected[-1][0] + tolerance if expected else float("-inf")
+    extra = sum(1 for event in unmatched if event["time"] <= horizon)
+    return {"expected": len(expected), "matched": matched, "missed": len(expected) - matched,
+            "extra": extra, "max_error_s": round(max_error, 3)}
+
+
+def least_squares_slope(xs, ys):
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analyzer for hours against a fake LiveSplit and watch for leaks")
+    parser.add_argument("--minutes", type=float, default=60.0, help="How long to run")
+    parser.add_argument("--report-interval", type=float, default=60.0, help="Seconds between samples")
+    parser.add_argument("--out", default=None, help="Append samples and the summary to this JSONL file")
+    parser.add_argument("--recording", default=None, help="Loop this video / PNG sequence instead of synthetic runs")
+    parser.add_argument("--config", default="config.json", help="Regions for --recording")
+    parser.add_argument("--level-seconds", type=float, default=20.0, help="Synthetic runs: length of every level")
+    parser.add_argument("--noise", type=float, default=4.0, help="Synthetic runs: pixel noise (0 lets the OCR cache skip most frames)")
+    parser.add_argument("--tolerance", type=float, default=3.0, help="Seconds a split may be early/late")
+    parser.add_argument("--max-rss-growth", type=float, default=50.0, help="MB of RSS growth after the first sample that fails the soak")
+    parser.add_argument("--ocr-backend", default="auto")
+    parser.add_argument("--serial", action="store_true", help="Capture and OCR in one thread instead of the pipeline")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    if args.recording:
+        source = LoopingFrameSource(args.recording)
+        regions = region_settings(load_config(args.config))
+    else:
+        source = SyntheticFrameSource(level_seconds=args.level_seconds, noise=args.noise)
+        # Synthetic regions are rendered at their own size, only their presence matters
+        regions = {f"{name}_region": {"top": 0, "left": 0, "width": 1, "height": 1} for name in Analyzer.REGION_NAMES}
+
+    server = FakeLiveSplitServer(port=0).start()
+    livesplit = LiveSplitClient("127.0.0.1", server.port)
+    logs = LogQueue(args.log_level)
+    # Learned templates go to a scratch directory, the user's files are untouched
+    scratch = tempfile.mkdtemp(prefix="soak_")
+    analyzer = Analyzer(
+        livesplit,
+        log_queue=logs,
+        ocr_backend=args.ocr_backend,
+        pipelined=not args.serial,
+        frame_source=source,
+        timer_template_path=os.path.join(scratch, "timer_templates.npz"),
+        countdown_template_path=os.path.join(scratch, "countdown_templates.npz"),
+        banner_fingerprint_path=os.path.join(scratch, "banner_fingerprints.npz"),
+        **regions
+    )
+
+    def run():
+        livesplit.connect()
+        analyzer.process_loop()
+
+    thread = threading.Thread(target=run, name="soak-analyzer", daemon=True)
+    started = time.time()
+    thread.start()
+    out = open(args.out, 'a', encoding='utf-8') if args.out else None
+    samples = []
+    last_total, last_time = 0, started
+
+    def write(record):
+        if out:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+    try:
+        while time.time() - started < args.minutes * 60 and thread.is_alive():
+            time.sleep(min(args.report_interval, max(0.1, started + args.minutes * 60 - time.time())))
+            now = time.time()
+            server_stats = server.stats()
+            metrics = analyzer.metrics.snapshot()
+            sample = {
+                "elapsed_s": round(now - started, 1),
+                "rss_mb": round(rss_mb(), 1),
+                "threads": native_threads(),
+                "python_threads": threading.active_count(),
+                "commands_per_s": round((server_stats["total"] - last_total) / (now - last_time), 1),
+                "fps": round(metrics["fps"], 1),
+                "ocr_per_s": round(metrics["ocr_per_s"], 1),
+                "livesplit_queue": livesplit.stats()["queue_depth"],
+                "log_dropped": logs.dropped,
+            }
+            last_total, last_time = server_stats["total"], now
+            events = server.commands("starttimer") + server.commands("split")
+            if isinstance(source, SyntheticFrameSource):
+                expected = source.expected_events(now - args.tolerance)
+                sample["splits"] = score_events(expected, sorted(events, key=lambda e: e["time"]), args.tolerance)
+            else:
+                sample["splits"] = {"starts": len(server.commands("starttimer")), "splits": len(server.commands("split")), "loops": source.loops}
+            samples.append(sample)
+            write(sample)
+            print(f"[{sample['elapsed_s'] / 60:6.1f} min] RSS {sample['rss_mb']:7.1f} MB  threads {sample['threads']:3d}  "
+                  f"cmd/s {sample['commands_per_s']:6.1f}  FPS {sample['fps']:5.1f}  OCR/s {sample['ocr_per_s']:5.1f}  "
+                  f"splits {sample['splits']}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped_early = not thread.is_alive()
+        analyzer.stop()
+        thread.join(timeout=10)
+        livesplit.close()
+        server.stop()
+        logs.close()
+
+    if not samples:
+        print("No samples collected", flush=True)
+        return 1
+
+    first, last = samples[0], samples[-1]
+    hours = [s["elapsed_s"] / 3600 for s in samples]
+    summary = {
+        "summary": True,
+        "minutes": round((time.time() - started) / 60, 1),
+        "rss_growth_mb": round(last["rss_mb"] - first["rss_mb"], 1),
+        "rss_slope_mb_per_h": round(least_squares_slope(hours, [s["rss_mb"] for s in samples]), 2),
+        "thread_growth": last["threads"] - first["threads"],
+        "splits": last["splits"],
+        "stopped_early": stopped_early,
+    }
+    failures = []
+    if stopped_early:
+        failures.append("the analyzer stopped before the end (see the log)")
+    if summary["rss_growth_mb"] > args.max_rss_growth:
+        failures.append(f"RSS grew {summary['rss_growth_mb']} MB")
+    if summary["thread_growth"] > 0:
+        failures.append(f"{summary['thread_growth']} more threads than at the first sample")
+    if last["splits"].get("missed") or last["splits"].get("extra"):
+        failures.append(f"splits {last['splits']}")
+    summary["failures"] = failures
+    write(summary)
+    if out:
+        out.close()
+
+    print(f"\nRSS {first['rss_mb']} -> {last['rss_mb']} MB ({summary['rss_slope_mb_per_h']} MB/h), "
+          f"threads {first['threads']} -> {last['threads']}, splits {last['splits']}", flush=True)
+    if failures:
+        print("SOAK FAILED: " + "; ".join(failures), flush=True)
+        return 1
+    print("Soak passed.", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Synthetic HUD images rendered with cv2.putText, used by the benchmarks and the
+soak test harness in place of real game frames.
+"""
+import math
+import random
+import time
+import cv2
+import numpy as np
+from frame_source import FrameSource
+from game_state import GameState
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Relative text size per region (the countdown digit is much bigger than the HUD text)
+REGION_FONT_SCALE = {
+    "timer": 1.0,
+    "gametype": 1.0,
+    "level": 0.9,
+    "countdown": 5.0,
+}
+
+
+def render_text(text, font_scale=1.0, noise=0.0, thickness=None, padding=8, rng=None):
+    """
+    White text on a dark background as a BGR image.
+    noise is the standard deviation of Gaussian noise added to every pixel (0-255 scale).
+    """
+    if thickness is None:
+        thickness = max(1, int(round(font_scale * 2)))
+    (width, height), baseline = cv2.getTextSize(text, FONT, font_scale, thickness)
+    img = np.full((height + baseline + 2 * padding, width + 2 * padding, 3), 20, dtype=np.uint8)
+    cv2.putText(img, text, (padding, padding + height), FONT, font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+    if noise > 0:
+        rng = rng or np.random.default_rng()
+        noisy = img.astype(np.float32) + rng.normal(0, noise, img.shape)
+        img = np.clip(noisy, 0, 255).astype(np.uint8)
+    return img
+
+
+def sample_text(region, rng=None):
+    """A plausible text for a region, e.g. '27:41' for the timer"""
+    rng = rng or random
+    if region == "timer":
+        return f"{rng.randint(0, 30):02d}:{rng.randint(0, 59):02d}"
+    if region == "gametype":
+        return rng.choice(["ZOMBIES", "SURVIVAL"])
+    if region == "level":
+        return rng.choice(GameState().level_sequence + ["ZOMBIES", "VICTOIRE"])
+    if region == "countdown":
+        return rng.choice(["3", "2", "1"])
+    raise ValueError(f"Unknown region: {region}")
+
+
+def render_region(region, text, scale=1.0, noise=0.0, rng=None):
+    """Render text the way a region shows it, scaled by scale"""
+    return render_text(text, REGION_FONT_SCALE[region] * scale, noise, rng=rng)
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    Live frames of scripted runs, repeated forever, rendered per region (region
+    coordinates are ignored). One cycle, in seconds since the source was opened:
+    - lobby: game type ZOMBIES, timer at 07:00, countdown 3, 2, 1 in its last 3 seconds
+    - run: the timer counts down from 30:00; every level lasts level_seconds, the
+      ZOMBIES banner shows in the last transition_seconds before a level and the
+      level name for banner_seconds after it starts; VICTOIRE ends the run
+    expected_events() lists the starts and splits LiveSplit should receive.
+    """
+    LOBBY_TIMER = "07:00"
+    RUN_TIMER = 30 * 60
+    MAX_CACHED = 512  # Rendered images kept when noise is 0
+
+    def __init__(self, levels=None, lobby_seconds=8.0, level_seconds=20.0, transition_seconds=2.0,
+                 banner_seconds=3.0, noise=4.0, seed=1234):
+        self.levels = list(levels or GameState.LEVELS)
+        self.lobby_seconds = lobby_seconds
+        self.level_seconds = level_seconds
+        self.transition_seconds = transition_seconds
+        self.banner_seconds = banner_seconds
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.run_seconds = len(self.levels) * level_seconds
+        self.cycle_seconds = lobby_seconds + self.run_seconds + banner_seconds
+        self.started = None
+        self.cache = {}
+        self.frames = 0
+
+    def open(self):
+        if self.started is None:
+            self.started = time.time()
+
+    def texts(self, t):
+        """{region: text} shown t seconds after the source was opened"""
+        cycle = t % self.cycle_seconds
+        texts = {"gametype": "ZOMBIES", "countdown": "", "level": "", "timer": self.LOBBY_TIMER}
+        if cycle < self.lobby_seconds:
+            remaining = self.lobby_seconds - cycle
+            if remaining <= 3:
+                texts["countdown"] = str(math.ceil(remaining))
+            return texts
+
+        run = cycle - self.lobby_seconds
+        texts["timer"] = "%02d:%02d" % divmod(max(0, int(self.RUN_TIMER - run)), 60)
+        index = int(run // self.level_seconds)
+        into_level = run - index * self.level_seconds
+        if index >= len(self.levels):
+            texts["level"] = "VICTOIRE"
+        elif into_level < self.banner_seconds:
+            texts["level"] = self.levels[index]
+        elif index + 1 < len(self.levels) and into_level >= self.level_seconds - self.transition_seconds:
+            texts["level"] = "ZOMBIES"
+        return texts
+
+    def expected_events(self, until):
+        """[(time, "starttimer" or "split")] of the cycles up to the time.time() until"""
+        events = []
+        cycle_start = self.started
+        while cycle_start is not None and cycle_start + self.lobby_seconds <= until:
+            run_start = cycle_start + self.lobby_seconds
+            events.append((run_start, "starttimer"))
+            for index in range(1, len(self.levels)):
+                events.append((run_start + index * self.level_seconds - self.transition_seconds, "split"))
+            events.append((run_start + self.run_seconds, "split"))
+            cycle_start += self.cycle_seconds
+        return [event for event in events if event[0] <= until]
+
+    def render(self, name, text):
+        text = text or " "  # Empty region, same height as with text
+        if self.noise:
+            return render_region(name, text, noise=self.noise, rng=self.rng)
+        img = self.cache.get((name, text))
+        if img is None:
+            if len(self.cache) >= self.MAX_CACHED:
+                self.cache.clear()
+            img = self.cache[(name, text)] = render_region(name, text)
+        return img
+
+    def grab(self, regions):
+        # The script runs on the wall clock (expected_events is compared with the
+        # fake server's times), frames are stamped like the other live sources
+        texts = self.texts(time.time() - self.started)
+        self.frames += 1
+        return time.monotonic(), {name: self.render(name, texts[name]) for name in regions}
@@ -0,0 +1,214 @@
+"""
+Append-only run telemetry: every run start, split, level change, finish and OCR
+anomaly is appended to <directory>/events.jsonl. One summary row per run
+(segment times, final time, day, offset of its first event) goes to
+<directory>/runs.jsonl, a compact index that answers queries without reading
+the events:
+
+    python telemetry.py telemetry --best --average --per-day
+
+Writes are buffered and done by a background thread; record() never touches the disk.
+"""
+import argparse
+import datetime
+import json
+import os
+import threading
+import time
+from collections import deque
+
+EVENTS_FILE = "events.jsonl"
+INDEX_FILE = "runs.jsonl"
+
+
+class TelemetryStore:
+    """
+    Buffered, append-only event writer. Runs are summarized into the index as
+    their events go by: a run ends with a "finish" event, or unfinished when the
+    next run starts or the store closes.
+    """
+    FLUSH_INTERVAL = 1.0  # Seconds between writes
+    MAX_PENDING = 10000   # Events beyond this are dropped (and counted) if the disk stalls
+
+    def __init__(self, directory="telemetry"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.events_path = os.path.join(directory, EVENTS_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+
+        self.pending = deque()
+        self.cond = threading.Condition()
+        self.running = True
+        self.run = None  # Summary of the run in progress
+        self._last_split = 0.0  # Game time of its previous split
+        self.writer = threading.Thread(target=self._writer_loop, name="telemetry", daemon=True)
+        self.writer.start()
+
+        # Counters
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, kind, **fields):
+        """Queue one event; the wall-clock time is added here"""
+        event = {"t": time.time(), "event": kind}
+        event.update(fields)
+        with self.cond:
+            if len(self.pending) >= self.MAX_PENDING:
+                self.dropped += 1
+                return
+            self.pending.append(event)
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.writer.join(timeout=5)
+
+    def _writer_loop(self):
+        with open(self.events_path, 'a', encoding='utf-8') as events, open(self.index_path, 'a', encoding='utf-8') as index:
+            while True:
+                with self.cond:
+                    if self.running:
+                        self.cond.wait(self.FLUSH_INTERVAL)  # Batches events into one write, close() wakes it
+                    batch = list(self.pending)
+                    self.pending.clear()
+                    stopping = not self.running
+
+                try:
+                    for event in batch:
+                        offset = events.tell()
+                        events.write(json.dumps(event) + "\n")
+                        self._summarize(event, offset, index)
+                    self.written += len(batch)
+                    events.flush()
+                    if stopping and self.run is not None:
+                        self._close_run(index)
+                    index.flush()
+                except (OSError, ValueError) as e:
+                    print(f"Telemetry write failed: {e}", flush=True)
+
+                if stopping:
+                    return
+
+    def _summarize(self, event, offset, index):
+        kind = event["event"]
+        if kind == "run_start":
+            if self.run is not None:
+                self._close_run(index)
+            started = event.get("capture_time", event["t"])
+            self.run = {
+                "run": f"{event['t']:.3f}",
+                "day": datetime.date.fromtimestamp(event["t"]).isoformat(),
+                "started": started,
+                "offset": offset,
+                "finished": False,
+                "final": None,
+                "segments": {},
+                "splits": 0,
+                "anomalies": 0,
+            }
+            self._last_split = 0.0
+        elif self.run is None:
+            return
+        elif kind == "split":
+            gametime = event.get("gametime")
+            if gametime is not None:
+                segment = event.get("segment")
+                if segment and segment not in self.run["segments"]:
+                    self.run["segments"][segment] = round(gametime - self._last_split, 3)
+                self._last_split = gametime
+            self.run["splits"] += 1
+        elif kind == "anomaly":
+            self.run["anomalies"] += 1
+        elif kind == "finish":
+            self.run["finished"] = True
+            self.run["final"] = event.get("gametime", self._last_split)
+            self._close_run(index)
+
+    def _close_run(self, index):
+        index.write(json.dumps(self.run) + "\n")
+        self.run = None
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped, "pending": len(self.pending)}
+
+
+def load_index(directory="telemetry"):
+    """Summary rows of every stored run, oldest first"""
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_events(directory, row):
+    """All events of one indexed run (seeks to its offset in the event log)"""
+    events = []
+    with open(os.path.join(directory, EVENTS_FILE), 'r', encoding='utf-8') as f:
+        f.seek(row["offset"])
+        for line in f:
+            event = json.loads(line)
+            if events and event["event"] == "run_start":
+                break
+            events.append(event)
+    return events
+
+
+def segment_times(rows, finished_only=False):
+    """segment -> list of game-time durations"""
+    times = {}
+    for row in rows:
+        if finished_only and not row["finished"]:
+            continue
+        for segment, duration in row["segments"].items():
+            times.setdefault(segment, []).append(duration)
+    return times
+
+
+def best_segments(rows):
+    return {segment: min(durations) for segment, durations in segment_times(rows).items()}
+
+
+def average_segments(rows):
+    return {segment: sum(durations) / len(durations) for segment, durations in segment_times(rows).items()}
+
+
+def runs_per_day(rows):
+    days = {}
+    for row in rows:
+        days[row["day"]] = days.get(row["day"], 0) + 1
+    return dict(sorted(days.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query stored run telemetry")
+    parser.add_argument("directory", nargs="?", default="telemetry")
+    parser.add_argument("--best", action="store_true", help="Best time of every segment")
+    parser.add_argument("--average", action="store_true", help="Average time of every segment")
+    parser.add_argument("--per-day", action="store_true", help="Number of runs per day")
+    args = parser.parse_args()
+
+    rows = load_index(args.directory)
+    finished = [row for row in rows if row["finished"]]
+    print(f"{len(rows)} runs ({len(finished)} finished)", flush=True)
+    finals = [row["final"] for row in finished if row["final"] is not None]
+    if finals:
+        print(f"Best final game time: {min(finals):.2f}s", flush=True)
+
+    if args.best:
+        print("\nBest segments:", flush=True)
+        for segment, duration in best_segments(rows).items():
+            print(f"  {segment:<12} {duration:8.2f}s", flush=True)
+    if args.average:
+        print("\nAverage segments:", flush=True)
+        for segment, duration in average_segments(rows).items():
+            print(f"  {segment:<12} {duration:8.2f}s", flush=True)
+    if args.per_day:
+        print("\nRuns per day:", flush=True)
+        for day, count in runs_per_day(rows).items():
+            print(f"  {day}  {count}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+X11 MIT-SHM screen capture through ctypes (Linux).
+
+mss grabs with XGetImage: the X server sends the pixels over the socket and a
+new screenshot buffer is allocated on every grab. With the MIT-SHM extension
+the server writes the pixels straight into a shared memory segment that is
+created once and read through NumPy views, so a grab allocates no pixel memory.
+
+Grabs go to consecutive places in the segment (a ring), because the region
+views of a frame are still being OCR'd by the pipeline while the next frames
+are captured. The segment holds SLOTS frames of the largest size grabbed so
+far, so a frame stays intact for at least SLOTS - 2 later grabs.
+"""
+import ctypes
+import ctypes.util
+import numpy as np
+
+ZPIXMAP = 2
+ALL_PLANES = ctypes.c_ulong(-1)
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage, the function table that follows is not used
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+_libs = None
+_x_errors = []
+
+
+@ERROR_HANDLER
+def _on_x_error(display, event):
+    # Xlib's default handler exits the process; only record that the request failed
+    _x_errors.append(event)
+    return 0
+
+
+def _load():
+    """(libX11, libXext, libc) with their prototypes, loaded once"""
+    global _libs
+    if _libs is not None:
+        return _libs
+    names = [ctypes.util.find_library(name) for name in ("X11", "Xext", "c")]
+    if not all(names):
+        raise OSError("libX11/libXext not found")
+    x11, xext = ctypes.CDLL(names[0]), ctypes.CDLL(names[1])
+    libc = ctypes.CDLL(names[2], use_errno=True)
+
+    display, ximage, info = ctypes.c_void_p, ctypes.POINTER(XImage), ctypes.POINTER(XShmSegmentInfo)
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = display
+    x11.XCloseDisplay.argtypes = [display]
+    x11.XDefaultScreen.argtypes = [display]
+    x11.XRootWindow.argtypes = [display, ctypes.c_int]
+    x11.XRootWindow.restype = ctypes.c_ulong
+    x11.XDefaultVisual.argtypes = [display, ctypes.c_int]
+    x11.XDefaultVisual.restype = ctypes.c_void_p
+    x11.XDefaultDepth.argtypes = [display, ctypes.c_int]
+    x11.XDisplayWidth.argtypes = [display, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [display, ctypes.c_int]
+    x11.XSync.argtypes = [display, ctypes.c_int]
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    x11.XSetErrorHandler.argtypes = [ERROR_HANDLER]
+    x11.XSetErrorHandler.restype = ERROR_HANDLER
+
+    xext.XShmQueryExtension.argtypes = [display]
+    xext.XShmCreateImage.argtypes = [display, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p, info, ctypes.c_uint, ctypes.c_uint]
+    xext.XShmCreateImage.restype = ximage
+    xext.XShmAttach.argtypes = [display, info]
+    xext.XShmDetach.argtypes = [display, info]
+    xext.XShmGetImage.argtypes = [display, ctypes.c_ulong, ximage, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    _libs = (x11, xext, libc)
+    return _libs
+
+
+class SharedSegment:
+    """System V shared memory segment attached by both the X server and this process"""
+
+    def __init__(self, display, size):
+        x11, xext, libc = _load()
+        self.display = display
+        self.size = size
+        self.info = XShmSegmentInfo()  # Referenced by the XImages, must outlive them
+
+        shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        address = libc.shmat(shmid, None, 0)
+        if address is None or address == ctypes.c_void_p(-1).value:
+            libc.shmctl(shmid, IPC_RMID, None)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        self.info.shmid = shmid
+        self.info.shmaddr = address
+        self.info.readOnly = 0
+        self.address = address
+
+        del _x_errors[:]
+        previous = x11.XSetErrorHandler(_on_x_error)
+        try:
+            attached = xext.XShmAttach(display, ctypes.byref(self.info))
+            x11.XSync(display, 0)
+        finally:
+            x11.XSetErrorHandler(previous)
+            # Removed once both sides detach, so the segment never outlives the process
+            libc.shmctl(shmid, IPC_RMID, None)
+        if not attached or _x_errors:
+            libc.shmdt(address)
+            raise RuntimeError("XShmAttach failed (remote X display?)")
+
+        self.buffer = (ctypes.c_ubyte * size).from_address(address)
+
+    def close(self):
+        x11, xext, libc = _load()
+        xext.XShmDetach(self.display, ctypes.byref(self.info))
+        x11.XSync(self.display, 0)
+        libc.shmdt(self.address)
+
+
+class XShmCapture:
+    """Screen grabs into a persistent MIT-SHM segment. grab(bbox) returns a BGRA view of it."""
+    name = "xshm"
+    SLOTS = 8  # Frames of the largest size the segment holds (pipeline: 3 queued + processed + capturing)
+
+    def __init__(self, slots=SLOTS):
+        self.slots = slots
+        self.display = None
+        self.segment = None
+        self.retired = []  # Outgrown segments, still referenced by frames in flight until close()
+        self.images = {}  # (width, height) -> XImage whose data is moved along the segment
+        self.cursor = 0
+        self.grabs = 0
+
+    def open(self):
+        x11, xext, _ = _load()
+        self.display = x11.XOpenDisplay(None)
+        if not self.display:
+            raise RuntimeError("Cannot open the X display (is DISPLAY set?)")
+        try:
+            if not xext.XShmQueryExtension(self.display):
+                raise RuntimeError("The X server has no MIT-SHM extension")
+            screen = x11.XDefaultScreen(self.display)
+            self.root = x11.XRootWindow(self.display, screen)
+            self.visual = x11.XDefaultVisual(self.display, screen)
+            self.depth = x11.XDefaultDepth(self.display, screen)
+            self.screen_size = (x11.XDisplayWidth(self.display, screen), x11.XDisplayHeight(self.display, screen))
+            # Attach a first segment now, so an unusable MIT-SHM fails here and mss can take over
+            self._image(64, 64)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.display:
+            return
+        x11, _, _ = _load()
+        for image in self.images.values():
+            image.contents.data = None  # The pixels belong to the segment
+            x11.XFree(image)
+        self.images = {}
+        for segment in self.retired + [self.segment]:
+            if segment:
+                segment.close()
+        self.segment = None
+        self.retired = []
+        x11.XCloseDisplay(self.display)
+        self.display = None
+
+    def _image(self, width, height):
+        image = self.images.get((width, height))
+        if image is not None:
+            return image
+        x11, xext, _ = _load()
+        frame_bytes = width * height * 4
+        if self.segment is None or frame_bytes * self.slots > self.segment.size:
+            # Grow: existing XImages point into the old segment, recreate them on demand
+            for old in self.images.values():
+                old.contents.data = None
+                x11.XFree(old)
+            self.images = {}
+            if self.segment:
+                self.retired.append(self.segment)
+            self.segment = SharedSegment(self.display, frame_bytes * self.slots)
+            self.cursor = 0
+
+        image = xext.XShmCreateImage(self.display, self.visual, self.depth, ZPIXMAP, None, ctypes.byref(self.segment.info), width, height)
+        if not image:
+            raise RuntimeError("XShmCreateImage failed")
+        if image.contents.bits_per_pixel != 32 or image.contents.bytes_per_line != width * 4:
+            x11.XFree(image)
+            raise RuntimeError(f"Unsupported screen format ({self.depth} bit depth)")
+        self.images[(width, height)] = image
+        return image
+
+    def grab(self, bbox):
+        left, top = int(bbox['left']), int(bbox['top'])
+        width, height = int(bbox['width']), int(bbox['height'])
+        if left < 0 or top < 0 or left + width > self.screen_size[0] or top + height > self.screen_size[1]:
+            raise ValueError(f"Capture area {bbox} is outside the screen {self.screen_size}")
+
+        image = self._image(width, height)
+        frame_bytes = width * height * 4
+        if self.cursor + frame_bytes > self.segment.size:
+            self.cursor = 0
+        offset = self.cursor
+        self.cursor += frame_bytes
+
+        _, xext, _ = _load()
+        image.contents.data = self.segment.address + offset
+        if not xext.XShmGetImage(self.display, self.root, image, left, top, ALL_PLANES.value):
+            raise RuntimeError("XShmGetImage failed")
+        self.grabs += 1
+        return np.ndarray((height, width, 4), dtype=np.uint8, buffer=self.segment.buffer, offset=offset)